@@ -2,6 +2,13 @@ import io
 import tarfile
 import gzip
 
+import ujson
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def dir2bytes(dirname:str) -> bytes:
     """Make an in-memory gzip'd tar archive from a directory with minimal copying.
 
@@ -25,3 +32,18 @@ def bytes2dir(tarbytes: bytes, dirname = '.') -> None:
     fileobj = io.BytesIO(tarbytes)
     with tarfile.TarFile(fileobj=io.BytesIO(gzip.decompress(tarbytes))) as tar:
         tar.extractall(dirname)
+
+
+def json_bytes(obj) -> bytes:
+    """UTF-8 JSON, straight to bytes with orjson when it's installed.
+
+    >>> json_bytes({'a': 'é'}) == '{"a":"é"}'.encode()
+    True
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # e.g. non-str keys, which ujson coerces.
+            pass
+    return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
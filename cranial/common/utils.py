@@ -71,7 +71,7 @@ def dieIf(msg: str, fn: Callable, *args, **kwargs):
     except Exception as e:
         logging.error('%s. Function: %s; Args: %s; Keywords: %s',
                       e, fn.__name__, args, kwargs)
-        raise Exception(msg)
+        raise Exception(msg) from e
 
 
 def warnIf(msg: str, fn: Callable, *args, **kwargs):
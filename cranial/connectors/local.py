@@ -88,11 +88,13 @@ class Connector(base.Connector):
                           type(source)))
             return False
 
+        local_path = None
         try:
             mode = 'wb' if self.binary else 'w'
 
-            # first write to a temp file
-            _, local_path = self.get_tmp_file()
+            # first write to a temp file, beside the target so the rename
+            # stays on one filesystem
+            _, local_path = self.get_tmp_file(dir=dir_path or '.')
             with open(local_path, mode) as f:
                 f.write(source)
 
@@ -104,15 +106,21 @@ class Connector(base.Connector):
         except Exception as e:
             log.error("{}\tbase_address={}\tname={}".format(
                 e, self.base_address, name))
+            if local_path is not None:
+                try:
+                    os.unlink(local_path)
+                except OSError:
+                    pass
             return False
 
-    def get_tmp_file(self):
-        fd, local_path = mkstemp()
+    def get_tmp_file(self, dir=None):
+        fd, local_path = mkstemp(dir=dir)
         os.close(fd)
         return fd, local_path
 
     def __del__(self):
-        [fh.close() for fh in self._open_files]
+        for fh in self._open_files:
+            fh.close()
 
 
 if __name__ == "__main__":
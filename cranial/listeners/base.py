@@ -1,6 +1,7 @@
 # Core modules.
 from abc import ABCMeta, abstractmethod
 import time
+from typing import Optional
 
 
 class ListenerHasNotResponded(Exception):
@@ -15,7 +16,17 @@ class Listener(metaclass=ABCMeta):
       implementation details. It's recommended to use a single Listener that
       recieves mesages and puts them into a thread-safe Queue for use by other
       threads.
+    - Listeners that can cheaply read many messages at once may also provide
+      `recv_many(max)`, returning a List of up to `max` messages.
+    - Listeners that decode messages may also provide a `messages` attribute.
+      Setting it True asks them to return each decoded message as a
+      cranial.messaging.base.Message that keeps the form it was read in.
     """
+    # True if receiving acknowledges the messages received before, e.g. by
+    # committing their offsets, so callers mustn't read ahead of handling
+    # them.
+    commits_on_recv = False
+
     def __init__(self, **kwargs):
         return
 
@@ -23,6 +34,11 @@ class Listener(metaclass=ABCMeta):
     def recv(self, **kwargs) -> bytes:
         return bytes()
 
+    def fileno(self) -> Optional[int]:
+        """A file descriptor that becomes readable when recv() has something
+        to return, or None if the Listener can't be waited on that way."""
+        return None
+
 
 class RespondingListener(Listener, metaclass=ABCMeta):
     """A RespondingListener handles only one message at a time, so it can
@@ -1,3 +1,6 @@
+from itertools import islice
+from typing import List
+
 from cranial.listeners import base
 from cranial.messaging.file import parts_to_path
 
@@ -17,3 +20,9 @@ class Listener(base.Listener):
 
     def recv(self, **kwargs):
         return next(self.f)
+
+    def recv_many(self, max=1024, **kwargs) -> List:
+        lines = list(islice(self.f, max))
+        if not lines:
+            raise StopIteration
+        return lines
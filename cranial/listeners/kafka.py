@@ -1,3 +1,5 @@
+from typing import List  # noqa
+
 from cranial.common import logger
 
 from cranial.listeners import base
@@ -9,6 +11,9 @@ log = logger.create('kafka_client',
 
 class Listener(base.Listener):
     """ Listens for messages on a single Kafka topic."""
+    # The default CarefulConsumer commits the last messages on each poll.
+    commits_on_recv = True
+
     def __init__(self, topic, consumer=None, **kwargs):
         self.topic = topic
         if not consumer:
@@ -40,3 +45,24 @@ class Listener(base.Listener):
             else:
                 log.info(alert)
             return None
+
+    def recv_many(self, max=1024, wait=0.1, do_raise=False):
+        """Returns up to `max` messages, waiting up to `wait` seconds for
+        them. Returns an empty List if none arrive, so callers can tell the
+        topic is idle.
+
+        Like recv(), asking for more commits what was returned before, so
+        callers should finish handling a List before asking for the next.
+        Messages from the last List aren't committed when the consumer is
+        closed."""
+        messages = []  # type: List[bytes]
+        for msg in self.consumer.consume(max, wait):
+            err = msg.error()
+            if err and do_raise:
+                raise Exception(
+                    'Error while polling for message: {}'.format(err))
+            elif err:
+                log.warning(err)
+            else:
+                messages.append(msg.value())
+        return messages
@@ -1,21 +1,80 @@
+import io
+import os
+import select
 import ujson as json
 import sys
+from typing import List
 
 from cranial.listeners import base
+from cranial.messaging.base import Message
 
 
 class Listener(base.Listener):
     """Reads a line from STDIN as a message."""
 
+    def __init__(self, **kwargs):
+        # Lines read by recv_many() but not yet returned, and the partial line
+        # after them.
+        self.lines = []  # type: List[bytes]
+        self.rest = b''
+        # When True, JSON objects are returned as a Message that also keeps
+        # the line they were read from, so it needn't be encoded again.
+        self.messages = False
+
     def recv(self, **kwargs):
         # sys.stdin can be replaced with something like StringIO, which
         # doesn't have 'buffer.' Otherwise, using the buffer is necessary
         # to be able to handle binary data.
         message = next(sys.stdin.buffer) if hasattr(sys.stdin, 'buffer') \
             else next(sys.stdin)
+        return self.decode(message)
+
+    def recv_many(self, max=1024, wait=None, **kwargs) -> List:
+        """Returns up to `max` messages, reading STDIN in large blocks rather
+        than a line at a time. Don't mix with recv(), which reads through
+        sys.stdin's own buffer.
+
+        With `wait`, returns an empty List if no complete line arrives within
+        that many seconds, rather than blocking until one does."""
+        fd = self.fileno()
+        if fd is None:
+            return [self.recv()]
+        while not self.lines:
+            if wait is not None and \
+                    not select.select([fd], [], [], wait)[0]:
+                return []
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                if not self.rest:
+                    raise StopIteration
+                self.lines, self.rest = [self.rest], b''
+                break
+            *lines, self.rest = (self.rest + chunk).split(b'\n')
+            # Keep the newline, as recv() does. The partial line after the
+            # last one waits for the rest of it to arrive.
+            self.lines = [m + b'\n' for m in lines]
+        lines, self.lines = self.lines[:max], self.lines[max:]
+        return [self.decode(m) for m in lines]
+
+    def decode(self, message):
         try:
             # Mypy doesn't know sys.stdin returns bytes.
-            message = json.loads(message)  # type: ignore
+            record = json.loads(message)  # type: ignore
         except:  # noqa
-            pass
-        return message
+            return message
+        if not self.messages or type(record) is not dict:
+            return record
+        m = Message(record)
+        text = message.strip()
+        if isinstance(text, bytes):
+            m.b = text
+            m.s = text.decode(m.encoding)
+        else:
+            m.s = text
+        return m
+
+    def fileno(self):
+        try:
+            return sys.stdin.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            return None
@@ -1,4 +1,5 @@
 import pickle
+from typing import List
 
 import boto3
 
@@ -29,10 +30,8 @@ def get_client(aws_keys: dict = None, new=False):
     return firehose
 
 
-def put_data(stream: str, data):
-    """Encodes data if it's not already bytes & delivers it."""
-    firehose = get_client()
-
+def to_record(data) -> dict:
+    """Encodes data if it's not already bytes, as a Firehose Record."""
     if type(data) is str:
         # Add newline as record seperator if not present.
         if data[-1] != '\n':
@@ -44,8 +43,13 @@ def put_data(stream: str, data):
         except Exception as e:
             log.warning(e)
             bits = pickle.dumps(data)
+    return {'Data': bits}
 
-    record = {'Data': bits}
+
+def put_data(stream: str, data):
+    """Encodes data if it's not already bytes & delivers it."""
+    firehose = get_client()
+    record = to_record(data)
     try:
         return firehose.put_record(DeliveryStreamName=stream, Record=record)
     # Retry once in case of dead client.
@@ -57,3 +61,26 @@ def put_data(stream: str, data):
         except Exception as e:
             log.error(str(e))
             raise e
+
+
+def put_records(stream: str, records: List[dict]) -> List[dict]:
+    """Delivers up to 500 Records in one request. Records the service
+    rejects are retried once. Returns those that still failed."""
+    firehose = get_client()
+    for attempt in range(2):
+        try:
+            resp = firehose.put_record_batch(DeliveryStreamName=stream,
+                                             Records=records)
+        # Retry once in case of dead client.
+        except Exception as e:
+            if attempt:
+                log.error(str(e))
+                raise e
+            log.warn(str(e))
+            firehose = get_client(new=True)
+            continue
+        if not resp.get('FailedPutCount'):
+            return []
+        records = [r for r, status in zip(records, resp['RequestResponses'])
+                   if 'ErrorCode' in status]
+    return records
@@ -0,0 +1,37 @@
+"""
+A shared requests.Session for the http* Notifiers.
+"""
+
+import atexit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds.
+TIMEOUT = (5, 30)
+
+
+def new_session(pool_size: int = 16) -> requests.Session:
+    """Keeps connections to each host alive between requests. Transient
+    server errors are retried by the adapter, with backoff, for any method,
+    as the Notifiers' own retry loops used to."""
+    retry_args = dict(total=3, backoff_factor=0.5,
+                      status_forcelist=[500, 502, 503, 504],
+                      raise_on_status=False)
+    try:
+        retry = Retry(allowed_methods=None, **retry_args)
+    except TypeError:  # urllib3 < 1.26
+        retry = Retry(method_whitelist=False, **retry_args)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# One per process. urllib3 already keeps a separate connection pool for
+# each (scheme, host, port) behind it, for up to pool_size hosts.
+session = new_session()
+atexit.register(session.close)
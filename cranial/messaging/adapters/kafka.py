@@ -1,6 +1,7 @@
 import datetime
 import os
 import socket
+from typing import List  # noqa
 
 import confluent_kafka as kafka
 
@@ -60,7 +61,7 @@ class CarefulConsumer(MustCommitConsumer):
     >>> while m2.value() == b'': m2 = c2.poll(1) # Sometimes 1st is empty.
     >>> m2.value() == m1.value()
     True
-    >>> c2.commit(m2, async=False)
+    >>> c2.commit(m2, asynchronous=False)
     >>> c2.last_message == None # Because we just committed it.
     True
     >>> c2.close()
@@ -76,6 +77,9 @@ class CarefulConsumer(MustCommitConsumer):
     def __init__(self, config):
         super().__init__(config)
         self.last_message = None
+        # The latest message per partition from the last consume(), which
+        # is committed once the caller asks for more.
+        self.last_batch = []  # type: List[kafka.Message]
 
     def __del__(self):
         """Ensure last message is committed on garbage collection."""
@@ -84,20 +88,41 @@ class CarefulConsumer(MustCommitConsumer):
             super().__del__()
 
     def close(self):
-        """Ensure last message is committed on close."""
+        """Ensure last message is committed on close. The last batch from
+        consume() may not have been handled yet, so it's left uncommitted,
+        to be delivered again."""
         if self.last_message:
             self.commit(self.last_message)
+        self.last_batch = []
         try:
             super().close()
         except RuntimeError:
             pass
 
-    def poll(self, timeout=-1):
+    def commit_previous(self):
+        """Commit whatever the last poll() or consume() returned."""
         if self.last_message:
             self.commit(self.last_message)
+        if self.last_batch:
+            super().commit(offsets=[
+                kafka.TopicPartition(m.topic(), m.partition(), m.offset() + 1)
+                for m in self.last_batch])
+            self.last_batch = []
+
+    def poll(self, timeout=-1):
+        self.commit_previous()
         self.last_message = super().poll(timeout)
         return self.last_message
 
+    def consume(self, num_messages=1, timeout=-1):
+        """As poll(), but returns a List of up to `num_messages`."""
+        self.commit_previous()
+        messages = super().consume(num_messages, timeout)
+        latest = {(m.topic(), m.partition()): m
+                  for m in messages if not m.error()}
+        self.last_batch = list(latest.values())
+        return messages
+
     def commit(self, *args, **kwargs):
         super().commit(*args, **kwargs)
         if args[0] == self.last_message or \
@@ -124,12 +149,16 @@ def get_bootstrappers():
         log.warning('No Kafka Hosts found. Set CRANIAL_KAFKA_BOOTSTRAPPERS.')
 
 
-def get_producer(hosts_csv: str = None):
+def get_producer(hosts_csv: str = None, config={}):
     bootstrappers = hosts_csv or get_bootstrappers()
-    return LoggingProducer({
+    combined_config = {
         'bootstrap.servers': bootstrappers,
         # librdkafka is noisey about disconnects that are OK.
-        'log.connection.close': False})
+        'log.connection.close': False,
+        # Let messages produced close together share a request.
+        'linger.ms': 5}
+    combined_config.update(config)
+    return LoggingProducer(combined_config)
 
 
 def get_solo_consumer(topic: str, hosts: str = None):
@@ -5,6 +5,7 @@ Helper module for example applications. Mimics ZeroMQ Guide's zhelpers.h.
 import binascii
 import os
 from random import randint
+import threading
 from time import time
 
 import zmq
@@ -14,6 +15,10 @@ from cranial.common import logger
 log = logger.get('ZMQ_LOGLEVEL')
 default_context = zmq.Context.instance()
 
+# Sockets for sends that don't wait for a reply, kept per thread because ZMQ
+# sockets aren't thread-safe.
+_local = threading.local()
+
 
 def socket_set_hwm(socket, hwm=-1):
     """libzmq 2/3/4 compatible sethwm"""
@@ -78,16 +83,36 @@ def send_string(s: str, host: str,
     >>> assert(send_string('exit', addr, wait=False) == '')
     """
     context = ctx or default_context
+    msg = s if type(s) is bytes else bytes(s, encoding)
+    if not wait:
+        # A REQ socket must read each reply before sending again, so only
+        # sends that ignore replies can share a connection.
+        get_dealer(host, context).send_multipart([b'', msg])
+        return ''
+
     client = context.socket(zmq.REQ)
     set_id(client)
     client.connect("tcp://" + host)
-
-    msg = s if type(s) is bytes else bytes(s, encoding)
     client.send(msg)
-    if wait:
-        return client.recv().decode(encoding, 'replace')
-    else:
-        return ''
+    return client.recv().decode(encoding, 'replace')
+
+
+def get_dealer(host: str, ctx=None):
+    """Returns this thread's DEALER socket connected to `host`, creating it
+    on first use. Replies sent to it are never read, so it holds at most one
+    and the peer drops the rest."""
+    context = ctx or default_context
+    sockets = getattr(_local, 'sockets', None)
+    if sockets is None:
+        sockets = _local.sockets = {}
+    client = sockets.get((context, host))
+    if client is None:
+        client = context.socket(zmq.DEALER)
+        client.rcvhwm = 1
+        set_id(client)
+        client.connect("tcp://" + host)
+        sockets[(context, host)] = client
+    return client
 
 
 def get_client(port=5678, host='localhost', ctx=None):
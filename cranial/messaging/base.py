@@ -3,13 +3,19 @@
 """
 
 from abc import ABCMeta, abstractmethod
+import asyncio
+from concurrent import futures
 from concurrent.futures import Executor, ThreadPoolExecutor
+import copy
+from functools import partial
 import importlib
-from random import randint
-from threading import Thread
-from time import time
-from typing import (Any, Dict, List, IO, Optional, Set,  # noqa
-                    Tuple, Union, TYPE_CHECKING)  # noqa
+import logging
+import os
+from random import randrange
+from threading import Lock, Thread
+from time import monotonic
+from typing import (Any, Dict, FrozenSet, List, IO, Optional, Set,  # noqa
+                    Tuple, Union, TYPE_CHECKING, cast)  # noqa
 
 from recordclass import structclass
 from recordclass.recordobject import recordobject
@@ -70,10 +76,25 @@ class Message():
                 self.s = self.raw.decode(self.encoding)
             else:
                 try:
-                    self.s = self.serde.dumps(self.dict(), **self.dumps_params)
-                except TypeError:
+                    s = self.serde.dumps(self.dict(), **self.dumps_params)
+                except (TypeError, ValueError):
+                    # ValueError from serdes, like orjson, that raise it
+                    # rather than TypeError for non-JSON input, e.g. an int.
+                    s = None
+                if s is None and self.serde != json:
+                    try:
+                        # e.g. non-str keys, which ujson coerces.
+                        s = json.dumps(self.dict(), ensure_ascii=False)
+                    except (TypeError, ValueError, OverflowError):
+                        pass
+                if s is None:
                     log.info("Couldn't deserialize %s", self.raw)
-                    self.s = str(self.raw)
+                    s = str(self.raw)
+                # Some serdes, e.g. orjson, encode straight to bytes.
+                if isinstance(s, bytes):
+                    self.b = s
+                    s = s.decode(self.encoding)
+                self.s = s
         return self.s
 
     def bytes(self):
@@ -83,11 +104,14 @@ class Message():
             elif isinstance(self.raw, str):
                 self.b = self.raw.encode(self.encoding)
             else:
-                self.b = bytes(self.str(), self.encoding)
+                s = self.str()
+                # str() may have kept the serde's own encoding.
+                self.b = self.b or bytes(s, self.encoding)
         return self.b
 
     def dict(self):
-        if not self.d:
+        # `is None`, so an empty result is memoized rather than reparsed.
+        if self.d is None:
             if isinstance(self.raw, dict):
                 return self.raw
             elif self.raw is None:
@@ -128,6 +152,12 @@ class NotifyException(Exception):
 
 
 class Notifier(metaclass=ABCMeta):
+    # True if send() takes UTF-8 encoded bytes in place of a str message.
+    accepts_bytes = False
+    # True if one instance's send() may be called from several threads at
+    # once. Messenger only sends concurrently through Notifiers that are.
+    thread_safe = False
+
     def __init__(self, **kwargs):
         pass
 
@@ -140,38 +170,69 @@ class Notifier(metaclass=ABCMeta):
              **kwargs):
         return False
 
+    def send_batch(self, messages: List, **kwargs) -> List:
+        """Send several messages with the same parameters. Notifiers that
+        can deliver many messages per request should override this."""
+        return [self.send(message=m, **kwargs) for m in messages]
+
 
 class AsyncNotifier(Notifier, metaclass=ABCMeta):
     @abstractmethod
     def finish(self):
         raise Exception('Not Implemented')
 
+    def detach(self) -> 'AsyncNotifier':
+        """Returns a copy that collects its own sends, but shares everything
+        else, e.g. the pool and wrapped Notifier. Finishing it waits on and
+        reports those sends only."""
+        if not hasattr(self, 'futures'):
+            return self
+        other = copy.copy(self)
+        other.futures = []
+        return other
+
 
 class Async_Wrapper(AsyncNotifier):
-    def __init__(self, notifier):
-        self.threads = []  # type: List[Thread]
-        self.results = {}  # type: Dict[str, bytes]
+    def __init__(self, notifier, max_workers: int = None):
+        # Reused across sends, rather than starting a Thread per address.
+        self.pool = ThreadPoolExecutor(
+            max_workers or min(32, (os.cpu_count() or 1) * 4))
+        self.futures = []  # type: List[Tuple[str, futures.Future]]
         self.notifier = notifier
-
-    def worker(self, address, message, endpoint, kwargs):
-        self.results[address] = self.notifier.send(
-            address, message, endpoint, **kwargs)
+        self.notifier_finishes = hasattr(notifier, 'finish')
+        # The same message is usually sent to many addresses in a row, so
+        # encode it once for Notifiers that accept bytes.
+        self.encodes = getattr(notifier, 'accepts_bytes', False)
+        self.last_message = None  # type: Optional[str]
+        self.last_encoded = b''
 
     def send(self, address=None, message=None, endpoint=None, **kwargs):
-        t = Thread(
-            target=self.worker, args=(address, message, endpoint, kwargs))
-        self.threads.append(t)
-        t.start()
+        if self.encodes and type(message) is str:
+            if message is not self.last_message:
+                self.last_message = message
+                self.last_encoded = message.encode('utf-8')
+            message = self.last_encoded
+        f = self.pool.submit(
+            self.notifier.send, address, message, endpoint, **kwargs)
+        self.futures.append((address, f))
         return True
 
     def finish(self):
         "Returns List of failed addresses."
-        for t in self.threads:
-            t.join()
-        if hasattr(self.notifier, 'finish'):
+        pending = self.futures
+        # Reset so long-lived wrappers don't accumulate finished work.
+        self.futures = []
+        fails = []  # type: List[str]
+        for address, f in pending:
+            e = f.exception()
+            if e is not None:
+                log.warning('Send to %s failed: %s', address, e)
+                fails.append(address)
+            elif f.result() is False:
+                fails.append(address)
+        if self.notifier_finishes:
             self.notifier.finish()
-
-        return [x[0] for x in self.results.items() if x[1] is False]
+        return fails
 
 
 class Async_WrapperPool(AsyncNotifier):
@@ -179,6 +240,7 @@ class Async_WrapperPool(AsyncNotifier):
         self.n_threads = n_threads
         self.futures = []  # type: List
         self.notifier = notifier
+        self.notifier_finishes = hasattr(notifier, 'finish')
         self.pool = ThreadPoolExecutor(self.n_threads)
 
     def send(self, address=None, message=None, endpoint=None, **kwargs):
@@ -192,43 +254,107 @@ class Async_WrapperPool(AsyncNotifier):
 
     def finish(self):
         "Returns List of exceptions."
-        errors = [f.exception() for f in self.futures]
+        # In completion order, so one slow send doesn't hold up the rest.
+        errors = [e for e in map(futures.Future.exception,
+                                 futures.as_completed(self.futures))
+                  if e is not None]
         self.futures = []
-        if hasattr(self.notifier, 'finish'):
+        if self.notifier_finishes:
             self.notifier.finish()
-        return [e for e in errors if e is not None]
+        return errors
 
 
-def default_factory(proto: str) -> Notifier:
+class AsyncioWrapperPool(AsyncNotifier):
+    """Runs sends on an event loop in a background thread.
+
+    A Notifier whose `send` is a coroutine function is awaited directly, so
+    a single thread can keep many sends in flight. Synchronous Notifiers
+    fall back to the loop's default executor. Uses uvloop when installed.
+    """
+    def __init__(self, notifier):
+        self.futures = []  # type: List[futures.Future]
+        self.notifier = notifier
+        self.notifier_finishes = hasattr(notifier, 'finish')
+        self.native = asyncio.iscoroutinefunction(notifier.send)
+        try:
+            import uvloop
+            self.loop = uvloop.new_event_loop()
+        except ImportError:
+            self.loop = asyncio.new_event_loop()
+        self.thread = Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def _do(self, address, message, endpoint, kwargs):
+        if self.native:
+            return await self.notifier.send(address, message, endpoint,
+                                            **kwargs)
+        return await self.loop.run_in_executor(
+            None,
+            partial(self.notifier.send, address, message, endpoint, **kwargs))
+
+    def send(self, address=None, message=None, endpoint=None, **kwargs):
+        f = asyncio.run_coroutine_threadsafe(
+            self._do(address, message, endpoint, kwargs), self.loop)
+        self.futures.append(f)
+        return True
+
+    def finish(self):
+        "Returns List of exceptions."
+        errors = [e for e in map(futures.Future.exception, self.futures)
+                  if e is not None]
+        self.futures = []
+        if self.notifier_finishes:
+            self.notifier.finish()
+        return errors
+
+
+# Protocol string, as given and lower-cased => (Notifier class, wrap in Async?)
+_protocol_table = {}  # type: Dict[str, Tuple[type, bool]]
+
+
+def _resolve_protocol(proto: str) -> Tuple[type, bool]:
     # Avoid case-sensitivity.
-    proto = proto.lower()
+    name = proto.lower()
 
     # Kafka is inherently Async; wrapping is unnecessary overheard.
-    assert not ('async' in proto and 'kafka' in proto)
+    assert not ('async' in name and 'kafka' in name)
 
     # Find the module that handles this Notifiction type.
-    name = proto.replace('async', '')
-    mod = importlib.import_module('cranial.messaging.' + name)
-    notifier = mod.Notifier()  # type: ignore
+    is_async = 'async' in name
+    mod = importlib.import_module(
+        'cranial.messaging.' + name.replace('async', ''))
+    entry = (mod.Notifier, is_async)  # type: ignore
+    _protocol_table[proto] = _protocol_table[name] = entry
+    return entry
+
+
+def default_factory(proto: str) -> Notifier:
+    cls, is_async = _protocol_table.get(proto) or _resolve_protocol(proto)
+    notifier = cls()
 
-    if 'async' in proto:
+    if is_async:
         notifier = Async_Wrapper(notifier)
 
     return notifier
 
 
 ServiceName = str
+# A cached Notifier, whether it has finish(), and whether it's async.
+_Entry = Tuple[Notifier, bool, bool]
 
 
 class Messenger():
-    time = 0
-    sent_success = set()  # type: Set[Tuple[str, str, str]]
+    # Monotonic deadline after which update_consumers() runs again.
+    next_refresh = 0.0
+    hedge_delay = None  # type: Optional[float]
+    sent_success = set()  # type: Set[Tuple[FrozenSet[str], str, str]]
 
     def __init__(
             self,
             endpoint: str = 'key',
             discovery: sd.Discovery = None,
-            factory=None, **kwargs) -> None:
+            factory=None,
+            hedge_delay: float = None, **kwargs) -> None:
         """
         Parameters
         ----------
@@ -242,35 +368,130 @@ class Messenger():
 
         factory:
             A function that takes a protocol string and returns a Notifier().
+
+        hedge_delay:
+            Seconds to wait on an "any" mode send before also sending to a
+            second instance. The first success wins, but both instances may
+            receive the message, so only use with idempotent consumers.
+            Disabled by default.
         """
         self.endpoint = endpoint
+        self.hedge_delay = hedge_delay
+        # Last instance index used per "any" mode service.
+        self._rr = {}  # type: Dict[ServiceName, int]
+        self._refresh_lock = Lock()
+        # Reused across notify() calls, keyed on (service, protocol), with
+        # flags for each. Kept here rather than set on Notifiers, which may
+        # not allow new attributes, e.g. with __slots__.
+        self._notifier_cache = {}  # type: Dict[Tuple[str, str], _Entry]
+        self._svc_proto = {}  # type: Dict[ServiceName, str]
         self.discovery = discovery or marathon.Discovery('CONTENT_PROCESSOR')
-        self.update_consumers()
         self.factory = factory if factory else default_factory
+        self.update_consumers()
+
+    def executor(self) -> ThreadPoolExecutor:
+        """Shared pool for fanning out sends from synchronous Notifiers."""
+        if not hasattr(self, 'pool'):
+            self.pool = ThreadPoolExecutor()
+        return self.pool
 
     def get_notifier_for_service(self, svc) -> Notifier:
-        # @TODO Create a Notifier Pool so we can reuse them?
-        proto = self.discovery.get_protocol(svc)
-        return self.factory(proto)
+        return self._notifier_entry(svc)[0]
+
+    def _notifier_entry(self, svc) -> _Entry:
+        """The Notifier for `svc`, whether it has finish(), and whether it's
+        an AsyncNotifier."""
+        proto = self._svc_proto.get(svc) or self.discovery.get_protocol(svc)
+        entry = self._notifier_cache.get((svc, proto))
+        if entry is None:
+            notifier = self.factory(proto)
+            # Checked once here, rather than per service on every notify().
+            # isinstance() against an ABC goes through
+            # ABCMeta.__instancecheck__.
+            entry = (notifier, hasattr(notifier, 'finish'),
+                     isinstance(notifier, AsyncNotifier))
+            self._notifier_cache[(svc, proto)] = entry
+        notifier, has_finish, is_async = entry
+        # Each caller collects its sends on its own copy, so concurrent
+        # notify() calls don't wait on, or report, each other's.
+        if is_async:
+            return cast(AsyncNotifier, notifier).detach(), has_finish, True
+        return entry
 
     def update_consumers(self):
         self.discovery.update()
-        self.time = time()
+        self.next_refresh = monotonic() + 300
+
+        # Snapshot of {mode: {svc: instances}}, skipping services with no
+        # instances, so notify() needn't query discovery per service.
+        index = {'all': {}, 'any': {}}  # type: Dict[str, Dict[str, List]]
+        for svc in self.discovery.services:
+            instances = self.discovery.get_instances(svc)
+            if instances:
+                # As before the index, any mode but "all" is sent as "any".
+                mode = self.discovery.get_mode(svc)
+                index['all' if mode == 'all' else 'any'][svc] = instances
+        self._mode_index = index
+        self._all_sends = sum(len(v) for v in index['all'].values())
+
+        # Protocol per service, so notify() needn't ask discovery for it.
+        self._svc_proto = {svc: self.discovery.get_protocol(svc)
+                           for svc in self.discovery.services}
+        # Drop Notifiers for services that are gone or changed protocol.
+        self._notifier_cache = {
+            k: n for k, n in self._notifier_cache.items()
+            if self._svc_proto.get(k[0]) == k[1]}
+
+        # The common deployment of one "any" service with one synchronous
+        # instance gets a dedicated path in notify().
+        self._single_service_fast = None  # type: Optional[Tuple]
+        if not index['all'] and len(index['any']) == 1:
+            (svc, instances), = index['any'].items()
+            if len(instances) == 1:
+                notifier, has_finish, is_async = self._notifier_entry(svc)
+                if not is_async:
+                    self._single_service_fast = (
+                        svc, instances[0], notifier, has_finish)
+
+    def refresh_consumers(self):
+        """update_consumers(), unless another thread already is. Callers
+        that lose the race carry on with the current consumers."""
+        if self._refresh_lock.acquire(blocking=False):
+            try:
+                if monotonic() >= self.next_refresh:
+                    self.update_consumers()
+            finally:
+                self._refresh_lock.release()
 
     def notify(self, message, wait=True):
         # Update hosts every 5 minutes, regardless.
-        if time() - self.time > 300:
-            self.update_consumers()
+        if monotonic() >= self.next_refresh:
+            self.refresh_consumers()
+
+        fast = self._single_service_fast
+        if fast is not None and wait:
+            return self._notify_single(message, *fast)
 
+        # Per call, since notify() may run in several threads at once.
         threads = {}  # type: Dict[ServiceName, Notifier]
         failed = []  # type: List[ServiceName]
-        for svc in self.discovery.services:
-            if self.discovery.get_mode(svc) == 'all':
-                t, f = self.notify_all(svc, message)
-            else:
-                t, f = self.notify_any(svc, message)
+        # A failed send may call update_consumers(), which replaces the
+        # index rather than mutating it, so these views stay valid.
+        index = self._mode_index
+        # Sends to "all" mode services go out together, and are only
+        # waited on once every service has been sent to.
+        fanout = self._all_sends + len(index['any']) > 1
+        sending = []  # type: List[Tuple[ServiceName, List]]
+        for svc, instances in index['all'].items():
+            threads[svc], results = self.send_all(
+                svc, message, instances, fanout)
+            sending.append((svc, results))
+        for svc, instances in index['any'].items():
+            t, f = self.notify_any(svc, message, instances)
             threads.update(t)
             failed.extend(f)
+        for svc, results in sending:
+            failed.extend(self.failed_all(svc, results))
 
         # Reset cache of delieveries.
         self.sent_success = set()
@@ -283,8 +504,9 @@ class Messenger():
         # Get results of any Async notifications.
         if wait:
             for svc, notifier in threads.items():
-                if hasattr(notifier, 'finish'):
-                    fails = notifier.finish()  # type: ignore
+                finish = getattr(notifier, 'finish', None)
+                if finish is not None:
+                    fails = finish()
                     if fails and len(fails) > 0:
                         failed.append('{svc}({hosts})'.format(
                             svc=svc, hosts=','.join(fails)))
@@ -295,35 +517,100 @@ class Messenger():
                                   ', '.join(failed))
         return wait or threads
 
-    def notify_all(self, svc, message: str) -> Tuple[Dict, List]:
-        threads = {}  # type: Dict[ServiceName, Notifier]
+    def _notify_single(self, message, svc, inst, notifier,
+                       has_finish) -> bool:
+        """Same as notify(wait=True) when discovery holds a single "any"
+        service with a single instance, minus the bookkeeping."""
         failed = []  # type: List[ServiceName]
-        for inst in self.discovery.get_instances(svc):
-            notifier = self.get_notifier_for_service(svc)
-            threads[svc] = notifier
-            log.debug(
-                'Attempt notify to "all" {}, instance {} via {}.'.format(
-                    svc, inst, type(notifier)))
-            success = notifier.send(inst, message, self.endpoint)
-            if not success:
-                self.update_consumers()
+        if not notifier.send(inst, message, self.endpoint):
+            self.update_consumers()
+            if not notifier.send(inst, message, self.endpoint):
                 failed.append(svc)
-        return threads, failed
 
-    def notify_any(self, svc, message: str) -> Tuple[Dict, List]:
+        if has_finish:
+            fails = notifier.finish()  # type: ignore
+            if fails and len(fails) > 0:
+                failed.append('{svc}({hosts})'.format(
+                    svc=svc, hosts=','.join(fails)))
+
+        if len(failed) > 0:
+            log.warn('Failed Notifications: {}'.format(failed))
+            raise NotifyException('Failed to notify services/hosts: ' +
+                                  ', '.join(failed))
+        return True
+
+    def notify_all(self, svc, message: str,
+                   instances: List[str] = None) -> Tuple[Dict, List]:
+        threads = {}  # type: Dict[ServiceName, Notifier]
+        failed = []  # type: List[ServiceName]
+        if instances is None:
+            instances = self.discovery.get_instances(svc)
+        if len(instances) == 0:
+            return threads, failed
+
+        notifier, results = self.send_all(
+            svc, message, instances, fanout=len(instances) > 1)
+        threads[svc] = notifier
+        return threads, self.failed_all(svc, results)
+
+    def send_all(self, svc, message: str, instances: List[str],
+                 fanout=True) -> Tuple[Notifier, List]:
+        """Starts sending to every instance of an "all" mode service, and
+        returns the Notifier and a List of results or Futures of them."""
+        notifier, _, is_async = self._notifier_entry(svc)
+        if log.isEnabledFor(logging.DEBUG):
+            for inst in instances:
+                log.debug('Attempt notify to "all" %s, instance %s via %s.',
+                          svc, inst, type(notifier))
+        # Encode once for all instances, rather than once per send.
+        if getattr(notifier, 'accepts_bytes', False) \
+                and len(instances) > 1 \
+                and type(message) is str:
+            message = message.encode('utf-8')
+
+        # AsyncNotifiers return immediately, so only synchronous Notifiers
+        # need the pool to avoid paying one round-trip per instance, and only
+        # those that can be shared between threads may use it.
+        if is_async or not fanout \
+                or not getattr(notifier, 'thread_safe', False):
+            return notifier, [notifier.send(inst, message, self.endpoint)
+                              for inst in instances]
+        pool = self.executor()
+        return notifier, [pool.submit(notifier.send, inst, message,
+                                      self.endpoint)
+                          for inst in instances]
+
+    def failed_all(self, svc, results: List) -> List[ServiceName]:
+        """Waits on results from send_all(). Returns `svc` once for each
+        instance that failed."""
+        failed = [svc for r in results
+                  if not (r.result() if isinstance(r, futures.Future) else r)]
+        # One refresh covers any number of failed instances.
+        if failed:
+            self.update_consumers()
+        return failed
+
+    def notify_any(self, svc, message: str,
+                   instances: List[str] = None) -> Tuple[Dict, List]:
         threads = {}  # type: Dict[ServiceName, Notifier]
         failed = []  # type: List[ServiceName]
 
-        instances = self.discovery.get_instances(svc)
+        if instances is None:
+            instances = self.discovery.get_instances(svc)
         if len(instances) == 0:
             return threads, failed
         # @TODO Accept optional Instance Selection function.
-        i = randint(0, len(instances) - 1)
-        notifier = self.get_notifier_for_service(svc)
+        # Round-robin, from a random start so that many Messengers don't
+        # all begin on the same instance.
+        i = self._rr.get(svc)
+        i = randrange(len(instances)) if i is None \
+            else (i + 1) % len(instances)
+        self._rr[svc] = i
+        notifier, _, is_async = self._notifier_entry(svc)
         threads[svc] = notifier
         log.debug(
-            'Attempt to notify "any" "{}", instance "{}" via {} at "{}".'.format(
-                svc, instances[i], type(notifier), self.endpoint))
+            'Attempt to notify "any" "%s", instance "%s" via %s at "%s".',
+            svc, instances[i], type(notifier), self.endpoint)
 
         # @TODO Most notifiers should pick local if possible?
         target = instances[i]
@@ -333,16 +620,21 @@ class Messenger():
         # to send the mesage more than once.
         # To best support this, all services that rely on distributed brokers
         # should register with the same host or set of hosts.
-        delivery = (','.join(sorted(instances)), message, self.endpoint)
+        delivery = (frozenset(instances), message, self.endpoint)
         if delivery in self.sent_success:
             return {}, []
-        else:
-            success = notifier.send(target, message, self.endpoint)
 
-        if not success:
-            self.update_consumers()
-            target = instances[i - 1] if i > 0 else instances[-1]
+        alt = instances[i - 1]
+        if self.hedge_delay is None or alt == target \
+                or is_async \
+                or not getattr(notifier, 'thread_safe', False):
             success = notifier.send(target, message, self.endpoint)
+            if not success:
+                self.update_consumers()
+                success = notifier.send(alt, message, self.endpoint)
+        else:
+            success = self.hedged_send(notifier, target, alt, message)
+
         if not success:
             failed.append(svc)
         else:
@@ -350,6 +642,33 @@ class Messenger():
 
         return threads, failed
 
+    def hedged_send(self, notifier: Notifier, target: str, alt: str,
+                    message: str):
+        """Send to `target`, and also to `alt` if `target` has not succeeded
+        within `hedge_delay` seconds. Returns the first successful result, or
+        False if both fail.
+        """
+        pool = self.executor()
+        pending = {pool.submit(notifier.send, target, message, self.endpoint)}
+        done, pending = futures.wait(pending, timeout=self.hedge_delay)
+        if done:
+            result = done.pop().result()
+            if result:
+                return result
+            self.update_consumers()
+
+        pending.add(pool.submit(notifier.send, alt, message, self.endpoint))
+        while pending:
+            done, pending = futures.wait(
+                pending, return_when=futures.FIRST_COMPLETED)
+            for f in done:
+                result = f.result()
+                if result:
+                    for p in pending:
+                        p.cancel()
+                    return result
+        return False
+
 
 class LocalMessenger(Messenger):
     """Writes to Local disk, instead of using service discovery.
@@ -395,14 +714,14 @@ class LocalMessenger(Messenger):
                  mode='all', hosts=None, extra_svcs: Dict = None,
                  *args, **kwargs) -> None:
         hosts = hosts or ['localhost']
-        self.endpoint = endpoint
         services = {'local': {
             'hosts': hosts,
             'protocol': 'File' if wait else 'AsyncFile',
             'mode': mode}}
         services.update(extra_svcs or {})
-        self.discovery = sd.PythonDiscovery(services)
-        self.factory = default_factory
+        super().__init__(endpoint=endpoint,
+                         discovery=sd.PythonDiscovery(services),
+                         factory=default_factory)
 
 
 class MessengerExecutor(Executor):
@@ -1,7 +1,15 @@
+from functools import lru_cache
+
 from cranial.messaging import base
 from celery import Celery
 
 
+@lru_cache(maxsize=32)
+def get_app(label: str, address: str) -> Celery:
+    """Reuse one app, and so its broker connection pool, per broker."""
+    return Celery(label, broker='pyamqp://guest@{}//'.format(address))
+
+
 class Notifier(base.Notifier):
     """ DEPRECATED. """
 
@@ -10,7 +18,6 @@ class Notifier(base.Notifier):
         self.namespace = task_namespace
 
     def send(self, address, message, endpoint, **kwargs):
-        celery = Celery(self.label,
-                        broker='pyamqp://guest@{}//'.format(address))
+        celery = get_app(self.label, address)
         celery.send_task(self.namespace + endpoint, (message,))
         return True
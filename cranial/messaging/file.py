@@ -1,6 +1,10 @@
+from collections import OrderedDict
+import io
 import json
 import os
-from typing import Dict, IO  # noqa
+from threading import Lock
+from time import monotonic
+from typing import Dict, IO, Set  # noqa
 
 from smart_open import open
 
@@ -9,6 +13,38 @@ from cranial.common import logger
 
 log = logger.get()
 
+# Bytes buffered per open file before writing through to the OS. finish()
+# flushes whatever remains.
+BUFFER_SIZE = 1 << 20
+
+# A send() to a file that hasn't been flushed for this many seconds flushes
+# it. The check only runs on send(), so records sent before a quiet spell
+# stay buffered until finish(), refresh() or the file is closed.
+FLUSH_INTERVAL = 1.0
+
+# Open files kept per Notifier. The least recently used is closed beyond it.
+MAX_OPEN = 64
+
+PAYLOAD_IN_ERRORS = bool(os.environ.get('CRANIAL_INCLUDE_PAYLOAD_IN_ERRORS'))
+
+_NL = 0x0A
+
+# Larger framing buffers are dropped after use rather than kept around.
+FRAME_SOFT_MAX = 128 * 1024
+
+# Directories already created by, or known to exist for, this process.
+_ensured_dirs = set()  # type: Set[str]
+
+# smart_open (de)compresses these transparently, so they must go through it.
+_COMPRESSED = ('.gz', '.bz2')
+
+
+def open_target(path: str, mode: str, buffering: int) -> IO:
+    """Plain local paths skip smart_open's URI dispatch."""
+    if '://' not in path and not path.endswith(_COMPRESSED):
+        return io.open(path, mode, buffering=buffering)
+    return open(path, mode, buffering=buffering)
+
 
 def parts_to_path(address: str, endpoint: str) -> str:
     """ Provides URI string based configurability, per cranial.common.config
@@ -32,7 +68,28 @@ class Notifier(base.Notifier):
 
     Tested in LocalMessenger().
     """
-    logfiles = {}  # type: Dict[str, IO]
+    accepts_bytes = True
+    # Sends are serialized by self.lock.
+    thread_safe = True
+
+    def __init__(self, buffer_size: int = BUFFER_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL,
+                 max_open: int = MAX_OPEN, **kwargs):
+        super().__init__(**kwargs)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_open = max_open
+        # Monotonic time each file was last flushed.
+        self.flushed = {}  # type: Dict[str, float]
+        # Per instance, so that __del__ closes only this Notifier's files.
+        # In least to most recently used order.
+        self.logfiles = OrderedDict()  # type: Dict[str, IO]
+        # Reopening any of these must append, not truncate.
+        self.opened = set()  # type: Set[str]
+        # A single Notifier may be shared by threads, e.g. Async_Wrapper.
+        self.lock = Lock()
+        # Reused to frame each record, under the lock.
+        self.frame = bytearray()
 
     def send(self, address=None, message='', endpoint=None, serde=json,
              append=False,
@@ -41,35 +98,79 @@ class Notifier(base.Notifier):
             raise Exception(
                 'Must provide either path, or address and endpoint.')
         endpoint = kwargs.get('path') or parts_to_path(address, endpoint)
-        log.debug('Writing to file: {}'.format(endpoint))
-        if type(message) is str:
-            message = message.encode('utf-8')
-        elif type(message) != bytes:
-            message = serde.dumps(message).encode('utf-8')
+        log.debug('Writing to file: %s', endpoint)
+        # Bytes first: Messenger and Async_Wrapper pre-encode for us.
+        if type(message) is not bytes:
+            if isinstance(message, str):
+                message = message.encode('utf-8')
+            else:
+                message = serde.dumps(message).encode('utf-8')
         try:
-            if endpoint not in self.logfiles.keys() \
-                    or self.logfiles[endpoint].closed:
-                d, _ = os.path.split(endpoint)
-                # make sure the path exists for actual local files.
-                if d != '' and '://' not in endpoint:
-                    os.makedirs(d, exist_ok=True)
-                self.logfiles[endpoint] = open(endpoint,
-                                               'ab' if append else 'wb')
-
-            bytes_written = self.logfiles[endpoint].write(
-                message + '\n'.encode('utf-8'))
+            with self.lock:
+                fh = self.logfiles.get(endpoint)
+                if fh is not None and not fh.closed:
+                    self.logfiles.move_to_end(endpoint)
+                else:
+                    d = endpoint.rpartition('/')[0]
+                    # make sure the path exists for actual local files.
+                    if d != '' and '://' not in endpoint \
+                            and d not in _ensured_dirs:
+                        os.makedirs(d, exist_ok=True)
+                        _ensured_dirs.add(d)
+                    if fh is None and len(self.logfiles) >= self.max_open:
+                        _, oldest = self.logfiles.popitem(last=False)
+                        oldest.close()
+                    append = append or endpoint in self.opened
+                    fh = open_target(endpoint, 'ab' if append else 'wb',
+                                     self.buffer_size)
+                    self.logfiles[endpoint] = fh
+                    self.logfiles.move_to_end(endpoint)
+                    self.opened.add(endpoint)
+                    self.flushed[endpoint] = monotonic()
+
+                # One write per record, so records from concurrent sends
+                # can't interleave with each other's newlines.
+                frame = self.frame
+                frame.clear()
+                frame += message
+                frame.append(_NL)
+                bytes_written = fh.write(frame)
+                if len(frame) > FRAME_SOFT_MAX:
+                    self.frame = bytearray()
+
+                now = monotonic()
+                if now - self.flushed[endpoint] > self.flush_interval:
+                    fh.flush()
+                    self.flushed[endpoint] = now
             if bytes_written > 0:
                 return message
             else:
                 raise Exception("Couldn't write to destination.")
         except Exception as e:
+            # Messages may be large, so by default only their size is given.
             raise base.NotifyException(
                 "{} || endpoint: {} || message: {}".format(
-                    e, endpoint, message))
+                    e, endpoint, message if PAYLOAD_IN_ERRORS
+                    else '[{} bytes]'.format(len(message)))) from e
 
     def finish(self):
-        [fh.flush() for fh in self.logfiles.values() if not fh.closed]
+        # Under the lock, since send() reorders logfiles as it goes.
+        with self.lock:
+            now = monotonic()
+            for endpoint, fh in self.logfiles.items():
+                if not fh.closed:
+                    fh.flush()
+                    self.flushed[endpoint] = now
+
+    def refresh(self):
+        """Closes open files. Each is reopened, to append, on the next send
+        to it."""
+        with self.lock:
+            for fh in self.logfiles.values():
+                fh.close()
+            self.logfiles.clear()
 
     def __del__(self):
-        for _, fh in self.logfiles.items():
-            fh.close()
+        with self.lock:
+            for fh in self.logfiles.values():
+                fh.close()
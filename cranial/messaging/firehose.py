@@ -1,8 +1,118 @@
+import atexit
+from threading import Lock, Timer
+from time import monotonic
+from typing import Dict, List  # noqa
+from weakref import WeakSet
+
+from cranial.common import logger
 from cranial.messaging.adapters import firehose
 from cranial.messaging import base
 
+log = logger.get()
+
+# PutRecordBatch limits.
+MAX_RECORDS = 500
+MAX_BYTES = 4 * 1024 * 1024
+
+# Seconds a record may wait in the buffer for others to join its batch.
+LINGER = 1.0
+
+# Notifiers that may still hold records when the interpreter exits.
+_live = WeakSet()  # type: WeakSet
+
+
+@atexit.register
+def _finish_all():
+    for notifier in list(_live):
+        failed = notifier.finish()
+        if failed:
+            log.error('Firehose records undeliverable at exit: %s', failed)
+
 
 class Notifier(base.Notifier):
+    """Buffers records per delivery stream, and delivers them with
+    PutRecordBatch once a batch is full, once its oldest record has waited
+    `linger` seconds, when finish() is called, or at exit.
+    """
+    thread_safe = True
+
+    def __init__(self, linger: float = LINGER, **kwargs):
+        super().__init__(**kwargs)
+        self.linger = linger
+        self.buffers = {}  # type: Dict[str, List[dict]]
+        self.sizes = {}  # type: Dict[str, int]
+        # Monotonic time the oldest buffered record for each stream arrived.
+        self.started = {}  # type: Dict[str, float]
+        # Delivers each stream's batch once it has lingered, if no send()
+        # or finish() has by then.
+        self.timers = {}  # type: Dict[str, Timer]
+        # send() may be called from several threads, e.g. Messenger's pool.
+        self.lock = Lock()
+        _live.add(self)
+
     def send(self, address, message, endpoint, **kwargs):
-        resp = firehose.put_data(endpoint, message)
-        return resp
+        record = firehose.to_record(message)
+        size = len(record['Data'])
+        batches = []
+        with self.lock:
+            if self.sizes.get(endpoint, 0) + size > MAX_BYTES:
+                batches.append(self._take(endpoint))
+            buffer = self.buffers.setdefault(endpoint, [])
+            buffer.append(record)
+            self.sizes[endpoint] = self.sizes.get(endpoint, 0) + size
+            now = monotonic()
+            if len(buffer) >= MAX_RECORDS or \
+                    now - self.started.setdefault(endpoint, now) \
+                    >= self.linger:
+                batches.append(self._take(endpoint))
+            elif endpoint not in self.timers:
+                timer = Timer(self.linger, self._expire, (endpoint,))
+                timer.daemon = True
+                timer.start()
+                self.timers[endpoint] = timer
+        # Delivered outside the lock, so other threads can keep buffering.
+        failed = [b for b in batches
+                  if b and firehose.put_records(endpoint, b)]
+        return not failed
+
+    def _take(self, endpoint) -> List[dict]:
+        """Removes and returns the buffered records for one stream. Call
+        with the lock held."""
+        timer = self.timers.pop(endpoint, None)
+        if timer is not None:
+            timer.cancel()
+        self.sizes.pop(endpoint, None)
+        self.started.pop(endpoint, None)
+        return self.buffers.pop(endpoint, [])
+
+    def _expire(self, endpoint):
+        """Runs on a timer thread, so there's no caller to report to."""
+        try:
+            if not self.flush(endpoint):
+                log.error('Firehose rejected records for %s.', endpoint)
+        except Exception as e:
+            log.error('Firehose delivery to %s failed: %s', endpoint, e)
+
+    def flush(self, endpoint) -> bool:
+        """Delivers the buffered records for one stream. Returns False if
+        any were rejected."""
+        with self.lock:
+            records = self._take(endpoint)
+        if not records:
+            return True
+        return not firehose.put_records(endpoint, records)
+
+    def finish(self):
+        "Returns List of streams that had undeliverable records."
+        with self.lock:
+            endpoints = list(self.buffers)
+        return [endpoint for endpoint in endpoints
+                if not self.flush(endpoint)]
+
+    def __del__(self):
+        # Pending timers keep a Notifier alive, so this is a last resort.
+        # No requests during garbage collection; owners must call finish().
+        pending = sum(len(records) for records in self.buffers.values())
+        if pending:
+            log.warning('Firehose Notifier dropped %d unsent records.',
+                        pending)
@@ -1,23 +1,22 @@
-from time import sleep
-
 import requests
 
 from cranial.messaging import base
+from cranial.messaging.adapters.http import session, TIMEOUT
 
 
 class Notifier(base.Notifier):
+    # Stateless; the shared session's connection pool is thread-safe.
+    thread_safe = True
+
     @staticmethod
     def send(address, message, endpoint, **kwargs):
-        count = 0
-        while count < 3:
-            response = requests.get('http://{}/{}/{}'.format(
-                address, endpoint, message.strip()))
-            if response.status_code == requests.codes.ok:
-                try:
-                    return response.json()
-                except ValueError:
-                    return response.text
-            count += 1
-            sleep(5)
+        response = session.get(
+            'http://{}/{}/{}'.format(address, endpoint, message.strip()),
+            timeout=TIMEOUT)
+        if response.status_code == requests.codes.ok:
+            try:
+                return response.json()
+            except ValueError:
+                return response.text
 
         return False
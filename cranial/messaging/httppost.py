@@ -1,24 +1,24 @@
-from time import sleep
-
 import requests
 
 from cranial.messaging import base
+from cranial.messaging.adapters.http import session, TIMEOUT
 
 
 class Notifier(base.Notifier):
+    # Stateless; the shared session's connection pool is thread-safe.
+    thread_safe = True
+
     @staticmethod
     def send(address, message, endpoint, **kwargs):
-        count = 0
         # Don't send empty messages.
-        while count < 3 and message.strip() != '':
-            response = requests.post('http://{}/{}'.format(
-                address, endpoint), data=message)
-            if response.status_code == requests.codes.ok:
-                try:
-                    return response.json()
-                except ValueError:
-                    return response.text
-            count += 1
-            sleep(5)
+        if message.strip() == '':
+            return False
+        response = session.post('http://{}/{}'.format(address, endpoint),
+                                data=message, timeout=TIMEOUT)
+        if response.status_code == requests.codes.ok:
+            try:
+                return response.json()
+            except ValueError:
+                return response.text
 
         return False
@@ -1,44 +1,52 @@
-from time import sleep
+import logging
 from typing import Union
 
 import requests
-import ujson as json
 
 from cranial.common import logger
+from cranial.common.serialize import json_bytes
 from cranial.messaging import base
+from cranial.messaging.adapters.http import session, TIMEOUT
 
 log = logger.get()
 
+# Shared, so never mutated.
+_JSON_HEADERS = {'content-type': 'application/json; charset=utf-8'}
+
 
 class Notifier(base.Notifier):
+    # Stateless; the shared session's connection pool is thread-safe.
+    thread_safe = True
+
     @staticmethod
     def send(address: str,
              message: Union[dict, str, bytes],
              endpoint: str,
              headers: dict = None,
              **kwargs):
-        count = 0
-        msgstr = str(message).strip()
-        headers = headers or {}
+        # Dicts go straight to JSON; str() of one would be wasted work.
         if type(message) is dict:
-            data = json.dumps(message, ensure_ascii=False).encode()
+            data = json_bytes(message)
         else:
-            data = msgstr.encode()
+            data = str(message).strip().encode()
 
-        if data.startswith(b'{"') and 'content-type' not in headers:
-            headers['content-type'] = 'application/json; charset=utf-8'
+        if data.startswith(b'{"'):
+            if not headers:
+                headers = _JSON_HEADERS
+            elif 'content-type' not in headers:
+                headers = {**headers, **_JSON_HEADERS}
 
         # Don't send empty messages.
-        while count < 3 and msgstr != '':
+        if data == b'':
+            return False
+        if log.isEnabledFor(logging.DEBUG):
             log.debug('Sending headers %s; Body: %s', headers, data)
-            response = requests.post('https://{}/{}'.format(
-                address, endpoint), data=data, headers=headers)
-            if response.status_code == requests.codes.ok:
-                try:
-                    return response.json()
-                except ValueError:
-                    return response.text
-            count += 1
-            sleep(1)
+        response = session.post('https://{}/{}'.format(address, endpoint),
+                                data=data, headers=headers, timeout=TIMEOUT)
+        if response.status_code == requests.codes.ok:
+            try:
+                return response.json()
+            except ValueError:
+                return response.text
 
         return False
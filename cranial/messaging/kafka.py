@@ -1,6 +1,8 @@
+import atexit
 from typing import List, TYPE_CHECKING  # noqa
 
 from cranial.common import logger
+from cranial.common.serialize import json_bytes
 from cranial.messaging import base
 
 if TYPE_CHECKING:
@@ -17,6 +19,9 @@ class MockKafkaProducer:
     def produce(self, endpoint, message):
         self.queue.append('{}: {}'.format(endpoint, message))
 
+    def poll(self, timeout):
+        return 0
+
     def flush(self):
         for m in self.queue:
             print(m)
@@ -25,9 +30,13 @@ class MockKafkaProducer:
 
 def get_reusable_kafka_producer(hosts_csv):
     global reusable_producer_instance
-    from cranial.messaging.adapters import kafka as kafka_client
     if not reusable_producer_instance:
+        # Imported here so confluent_kafka is only needed once a real
+        # producer is, e.g. not for MockKafkaProducer.
+        from cranial.messaging.adapters import kafka as kafka_client
         reusable_producer_instance = kafka_client.get_producer(hosts_csv)
+        # Deliver anything still queued by notify(wait=False) callers.
+        atexit.register(reusable_producer_instance.flush)
     return reusable_producer_instance
 
 
@@ -78,20 +87,47 @@ class Notifier(base.Notifier):
     >>> 'test' in threads and type(threads['test'])
     <class 'kafka.Notifier'>
     """
+    accepts_bytes = True
+    # The confluent_kafka Producer may be shared between threads.
+    thread_safe = True
 
     def __init__(self,
                  hosts_csv: str = None,
                  client: 'confluent_kafka.Producer' = None) -> None:
         self.client = client or get_reusable_kafka_producer(hosts_csv)
+        # Whether produce() has been called since the last flush().
+        self.pending = False
 
     def send(self, address, message, endpoint, **kwargs):
         """ Note `address` is ignored, since routing is handled by the
         kafka_client.
         """
-        log.debug('Sent "{}" to Kafka stream {}.'.format(message, endpoint))
+        log.debug('Sent "%s" to Kafka stream %s.', message, endpoint)
+        # str and bytes go straight to the C client, which encodes str
+        # itself. Anything else would be rejected, so send it as JSON.
+        if not isinstance(message, (bytes, str)):
+            message = json_bytes(message)
         self.client.produce(endpoint, message)
+        # Serve delivery callbacks from earlier sends without blocking.
+        self.client.poll(0)
+        self.pending = True
         return self
 
+    def send_batch(self, messages, endpoint=None, **kwargs):
+        log.debug('Sending %d messages to Kafka stream %s.',
+                  len(messages), endpoint)
+        for message in messages:
+            if not isinstance(message, (bytes, str)):
+                message = json_bytes(message)
+            self.client.produce(endpoint, message)
+        self.client.poll(0)
+        self.pending = True
+        return [self] * len(messages)
+
     def finish(self):
-        self.client.flush()
+        # send() never flushes, so a Messenger.notify() batch costs a single
+        # broker round-trip here, and none at all if nothing was sent.
+        if self.pending:
+            self.client.flush()
+            self.pending = False
         return []
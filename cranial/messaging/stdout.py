@@ -1,8 +1,12 @@
+import sys
+
 from cranial.messaging import base
 import ujson as json
 
 
 class Notifier(base.Notifier):
+    thread_safe = True
+
     @staticmethod
     def send(address=None, message='', endpoint=None,
              serde=json, serde_args=None, **kwargs):
@@ -18,7 +22,11 @@ class Notifier(base.Notifier):
                 serde_args['ensure_ascii'] = False
             message = serde.dumps(message, **serde_args)
 
+        # One write per line, where print() makes two, so lines from
+        # concurrent sends can't interleave. sys.stdout is looked up per
+        # call, since it may be redirected.
         if len(label):
-            print("{}: {}".format(', '.join(label), message))
+            sys.stdout.write('{}: {}\n'.format(', '.join(label), message))
         elif len(message):
-            print(message[:-1] if message[-1] == '\n' else message)
+            sys.stdout.write('{}\n'.format(
+                message[:-1] if message[-1] == '\n' else message))
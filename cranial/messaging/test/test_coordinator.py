@@ -1,5 +1,7 @@
+from bisect import bisect_left, insort
+import heapq
 import logging
-from time import time, sleep
+from time import monotonic, time, sleep
 from typing import Any, Dict, Iterator, List, Tuple  # noqa
 
 from aioetcd3.client import Client
@@ -29,15 +31,22 @@ def _serial_producer(qty, mps=1000):
     >>> mis if len(mis) == 0 else l[mis[0]-5:mis[0]+5]
     []
     """
+    interval = 1/mps
+    next_at = monotonic()
     i = 0
     while True:
         if i >= qty:
             return
-        latest = time()
         yield i, None
         i += 1
-        if time() - latest < 1/mps:
-            sleep(1/mps)
+        # Sleep off whatever is left of this message's interval. A slow
+        # consumer restarts the schedule rather than getting a burst.
+        next_at += interval
+        delay = next_at - monotonic()
+        if delay > 0:
+            sleep(delay)
+        else:
+            next_at = monotonic()
 
 
 def _producer(duration, mps=1000) -> Iterator[Tuple[MsgId, Msg]]:
@@ -61,10 +70,13 @@ def _producer(duration, mps=1000) -> Iterator[Tuple[MsgId, Msg]]:
     []
     """
     starttime = time()*mps
+    end = duration*mps
     i = 0
     while True:
-        if i >= duration*mps:
+        if i >= end:
             return
+        # Derived from the clock per message, so a slow consumer skips no
+        # more ids than the rate requires.
         i = int(time()*mps - starttime)
         yield i, None
 
@@ -88,7 +100,37 @@ class FakeClient(Client):
         self.p = prefix
         self.store = {}
         self.leases = {}
+        # (expiry, keys) for each entry in self.leases, soonest first.
+        self._lease_heap = []  # type: List[Tuple[float, List[str]]]
         self.rev = 0
+        # Sorted keys of self.store, so range() can bisect to a prefix like
+        # etcd does, and each entry already encoded as range() returns it.
+        # Only kept for the store created here; a store swapped in from
+        # outside, e.g. a Manager dict, is scanned instead.
+        self._keys = []  # type: List[str]
+        self._encoded = {}  # type: Dict[str, Tuple[bytes, bytes]]
+        self._indexed = self.store
+
+    def _prefixed(self, r: str) -> List[str]:
+        keys = self._keys
+        lo = bisect_left(keys, r)
+        if not r:
+            return keys[lo:]
+        hi = bisect_left(keys, r[:-1] + chr(ord(r[-1]) + 1), lo)
+        return keys[lo:hi]
+
+    def _set(self, key: str, value: str):
+        if self.store is self._indexed:
+            if key not in self.store:
+                insort(self._keys, key)
+            self._encoded[key] = (bytes(key, 'utf-8'), bytes(value, 'utf-8'))
+        self.store[key] = value
+
+    def _del(self, key: str):
+        del(self.store[key])
+        if self.store is self._indexed:
+            del(self._keys[bisect_left(self._keys, key)])
+            del(self._encoded[key])
 
     async def preload(self):
         # Initial testing data.
@@ -105,53 +147,62 @@ class FakeClient(Client):
     async def grant_lease(self, ttl: int):
         t = time() + ttl
         self.leases[t] = []
+        heapq.heappush(self._lease_heap, (t, self.leases[t]))
         return t
 
     async def range(self, r) -> List[Tuple[bytes, bytes, FakeMeta]]:
         # Delete expired keys.
-        for t in self.leases:
-            if t < time():
-                for key in self.leases[t]:
-                    del(self.store[key])
-                del(self.leases[t])
+        heap = self._lease_heap
+        now = time()
+        while heap and heap[0][0] < now:
+            t, keys = heapq.heappop(heap)
+            for key in keys:
+                if key in self.store:
+                    self._del(key)
+            self.leases.pop(t, None)
 
         meta = FakeMeta(self.rev)
         self.rev += 1
         if type(r) is tuple:
             r = r[0]
-        logging.debug('range %s', r)
-        return [(bytes(k, 'utf-8'),
-                 bytes(v, 'utf-8'),
-                 meta)
-                for k, v in self.store.items() if k.startswith(r)]
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug('range %s', r)
+        if self.store is not self._indexed:
+            return [(bytes(k, 'utf-8'),
+                     bytes(v, 'utf-8'),
+                     meta)
+                    for k, v in self.store.items() if k.startswith(r)]
+        encoded = self._encoded
+        return [encoded[k] + (meta,) for k in self._prefixed(r)]
 
     async def put(self, key, value, lease=None):
         # logging.debug('Putting %s => %s', key, value)
-        self.store[str(key)] = str(value)
-        if lease:
-            self.leases[lease] = str(key)
+        self._set(str(key), str(value))
+        if lease in self.leases:
+            self.leases[lease].append(str(key))
 
         # Simulate worker 'a' responding to requests.
         if key == self.p+'req/a':
-            logging.debug(value)
             requestor, rev = value.split(',')
             if '1' in self.store[self.p+'parts/a'].split(','):
-                self.store['{}checkpoint/1'.format(self.p)] = '42'
-                self.store['{}ack/{}/a'.format(
-                    self.p, requestor)] = '{},{}'.format(rev, 1)
-            logging.debug('Store after request to `a`: %s', self.store)
+                self._set('{}checkpoint/1'.format(self.p), '42')
+                self._set('{}ack/{}/a'.format(self.p, requestor),
+                          '{},{}'.format(rev, 1))
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug('Request to `a`: %s. Store after: %s',
+                              value, self.store)
         if key.startswith(self.p+'group-req/6') \
                 and self.p+'parts/unassigned/6' in self.store:
             requestor = value
             rev = key.split('/')[-1]
-            self.store['{}ack/{}/group/{}/6'.format(
-                self.p, requestor, rev)] = '1'
+            self._set('{}ack/{}/group/{}/6'.format(
+                self.p, requestor, rev), '1')
         return True
 
     async def delete(self, key):
         if not key.startswith(self.p):
             key = self.p + key
-        del(self.store[key])
+        self._del(key)
 
 
 def _fake_client(prefix=PREFIX) -> Client:
@@ -3,5 +3,8 @@ from cranial.messaging.adapters.zmq import send_string
 
 
 class Notifier(base.Notifier):
+    # send_string() keeps a socket per thread.
+    thread_safe = True
+
     def send(self, address, message, endpoint=None, **kwargs):
         return send_string(message, address, wait=False)
@@ -2,10 +2,10 @@
 """Usage:
     pipe [--debug] [--echo] [--response] [--update] [--include-empty]
             [--refresh <num>] [--key <key>] [--separator <sep>]
-            [--ext <str>] [--config <file>]
+            [--ext <str>] [--config <file>] [--batch <num>]
             [<listener>] [<target>]
     pipe [-erui] [-t <num>] [-k <key] [-s <sep>] [-x <str>] [-f file]
-         [<listener>] [<target>]
+         [-b <num>] [<listener>] [<target>]
     pipe --list
     pipe --help
 
@@ -23,6 +23,10 @@ Options:
                              ID to the end of the URI path.
   -x <str> --ext <str>       Suffix to append after ID when using -s.
   -f <file> --config <file>  Config file. [default: pipe.yml]
+  -b <num> --batch <num>     Send up to this many messages to the target at
+                             once. Only used for a single target, and not
+                             with -r, -u, a cache_key, or listeners that
+                             commit as they receive, like kafka.
   -l --list                  List supported protocols & exit.
 
 Usage examples:
@@ -54,26 +58,74 @@ Config Example:
 listener: module=stdin
 target: module=httpget address=localhost:8000 endpoint=hello
 sleep: 10
+# Send each message to every pipeline stage at once, instead of passing each
+# stage's response on to the next.
+fanout: true
+# Read up to this many messages ahead, on a separate thread, while sending.
+# Ignored for listeners that commit as they receive, like kafka.
+prefetch: 100
 """
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from logging import DEBUG
 import os
-from time import sleep, time
+import queue
+import selectors
+import sys
+from threading import Lock, Thread
+from time import monotonic, sleep, time
 from typing import Callable, Dict, List, Optional, Tuple  # noqa
 
 from cachetools import cached, TTLCache
-from docopt import docopt
 from recordclass import RecordClass
-import ujson as json
+try:
+    # Parses and encodes faster, and encodes straight to bytes.
+    import orjson as json
+except ImportError:
+    import ujson as json  # type: ignore
 
 import cranial.messaging  # noqa; For Typing.
 from cranial.messaging.base import Message, Notifier
 import cranial.common.config as config
 import cranial.common.logger as logger
-from cranial.common.utils import dieIf, warnIf
+from cranial.common.utils import dieIf
 
 logging = logger.get()
 
-opts = docopt(__doc__)
+OPTION_DEFAULTS = {
+    '--debug': False, '--echo': False, '--response': False,
+    '--update': False, '--include-empty': False, '--refresh': None,
+    '--key': None, '--separator': None, '--ext': None,
+    '--config': 'pipe.yml', '--batch': None, '--list': False,
+    '--help': False, '<listener>': None, '<target>': None}
+
+
+def parse_args(argv: List[str]) -> Dict:
+    """Parse the common argument shapes without docopt, which is a large
+    share of startup time for one-shot pipes. Anything with options other than
+    --list goes through docopt as usual.
+
+    >>> parse_args(['-', 'out.txt'])['<target>']
+    'out.txt'
+    >>> parse_args(['--list'])['--list']
+    True
+    >>> from docopt import docopt
+    >>> parse_args(['-', 'out.txt']) == docopt(__doc__, ['-', 'out.txt'])
+    True
+    """
+    if argv == ['--list']:
+        return {**OPTION_DEFAULTS, '--list': True}
+    positional = [a for a in argv if a == '-' or not a.startswith('-')]
+    if len(argv) <= 2 and positional == argv:
+        return {**OPTION_DEFAULTS,
+                **dict(zip(('<listener>', '<target>'), argv))}
+    from docopt import docopt
+    return docopt(__doc__, argv)
+
+
+opts = parse_args(sys.argv[1:])
 
 if opts.get('--list'):
     import pkgutil
@@ -115,10 +167,17 @@ else:
           opts, prefix='cranial_pipe')
 
 
-if config.get('debug'):
+# Read once; config can't change after load().
+DEBUG_MODE = bool(config.get('debug'))
+
+if DEBUG_MODE:
     logging.setLevel('INFO')
     print(config.get())
 
+# The level is settled by now, so the per-message debug logs can be skipped
+# outright rather than each call checking it.
+DEBUG_LOG = logging.isEnabledFor(DEBUG)
+
 
 class NotifierTracker(RecordClass):
     target: Optional[Notifier]
@@ -126,16 +185,20 @@ class NotifierTracker(RecordClass):
     msg_count: int
     connect_time: float
     last_id: int = 0
+    # target.send with the target's params already bound.
+    send: Optional[Callable] = None
+    accepts_bytes: bool = False
+    # The params target was built with.
+    built: Optional[Dict] = None
 
 
-# ------------------[Notifier, Params, num messages, connect time]
-NotifierQuad = Tuple[Notifier, Dict,   int,          float]
 NOTIFIER_PARAMS = {'package': 'cranial.messaging', 'class': 'Notifier'}
+LISTENER_PARAMS = {'package': 'cranial.listeners', 'class': 'Listener'}
 
 
 def target_builder(params: Dict,
                    uri: str = ''
-                   ) -> Callable[[Notifier, int, float, int], NotifierQuad]:
+                   ) -> Callable[[NotifierTracker], Dict]:
     if type(params) is str:
         # It's a filename
         params = {'module': 'file',
@@ -146,83 +209,212 @@ def target_builder(params: Dict,
     refresh = params.get('refresh') or config.get('refresh')
     by_time = refresh and refresh.endswith('sec')
     refresh = refresh and int(refresh.replace('sec', ''))
+    by_count = bool(refresh and not by_time)
     sep = params.get('separator') or config.get('separator', '')
     extfmt = '{}' + sep + '{}' + (params.get('ext') or config.get('ext', ''))
 
     try:
-        config.factory({**NOTIFIER_PARAMS, **params})
+        # Building the target checks its protocol is known. It's kept for
+        # the first get_target() rather than built a second time.
+        prebuilt = [config.factory({**NOTIFIER_PARAMS, **params}),
+                    dict(params)]
     except ModuleNotFoundError:
         # Try unknown protocols through smart_open.
         params['module'] = 'file'
         params['path'] = uri
+        prebuilt = []
 
     orig_endpoint = params.get('endpoint', '')
     orig_path = params.get('path', '')
 
-    def get_target(target: Optional[Notifier],
-                   msg_count: int,
-                   connect_time: float,
-                   last_id: int) -> NotifierQuad:
-
-        if refresh and not by_time and msg_count >= refresh:
-            msg_count = 0
-
-        if (msg_count == 0) \
-                or (refresh and by_time and time() - connect_time > refresh):
+    def get_target(nt: NotifierTracker) -> Dict:
+        """(Re)builds the tracker's target, in place, when it's due, and
+        returns the target's params."""
+        # Without refreshes, which is the usual case, only the first call
+        # does anything after this test.
+        if nt.msg_count == 0 or refresh and (
+                nt.msg_count >= refresh if by_count
+                else monotonic() - nt.connect_time > refresh):
             if sep:
-                params['endpoint'] = extfmt.format(orig_endpoint, last_id)
+                params['endpoint'] = extfmt.format(orig_endpoint, nt.last_id)
                 if params.get('path'):
-                    params['path'] = extfmt.format(orig_path, last_id)
-
-            target = dieIf(
-                "Couldn't build Target",
-                config.factory,
-                {**NOTIFIER_PARAMS, **params})
-
-            return target, params, 0, time()
-        else:
-            return target, params, msg_count, connect_time
+                    params['path'] = extfmt.format(orig_path, nt.last_id)
+
+            if nt.built == params and hasattr(nt.target, 'refresh'):
+                # Same target, so only its connections need recreating.
+                nt.target.refresh()
+            else:
+                if prebuilt and prebuilt[1] == params:
+                    nt.target = prebuilt[0]
+                else:
+                    nt.target = dieIf(
+                        "Couldn't build Target",
+                        config.factory,
+                        {**NOTIFIER_PARAMS, **params})
+                # Later rebuilds must create a new target.
+                prebuilt.clear()
+                nt.built = dict(params)
+                nt.send = partial(nt.target.send, **{
+                    k: v for k, v in params.items() if k != 'message'})
+                nt.accepts_bytes = getattr(nt.target, 'accepts_bytes', False)
+            nt.msg_count = 0
+            nt.connect_time = monotonic()
+        return params
 
     return get_target
 
 
-def message_update(message: Message, response: Message) -> Message:
-    try:
-        response = response.dict()
-    except (TypeError, ValueError):
+def message_update(message: Message, response: Message,
+                   serde=json) -> Message:
+    raw = response.raw
+    # As in record_id(), only text that looks like an object is decoded.
+    if isinstance(raw, (str, bytes)) and raw.lstrip()[:1] not in ('{', b'{'):
         response = {"response": response.str()}
+    else:
+        try:
+            response = response.dict()
+        except (TypeError, ValueError):
+            response = {"response": response.str()}
 
     try:
         message = message.dict()
     except (TypeError, ValueError):
         message = {"message": message.str()}
 
-    return Message({**message, **response})
+    return Message({**message, **response}, serde=serde)
 
 
-def cache_key(target: Notifier, params: dict, message: dict):
+def cache_key(send: Callable, params: dict, message: dict, raw: str):
     return message[params['cache_key']].lower()
 
 
-@cached(TTLCache(2048, 86400), key=cache_key)
-def cached_send(target: Notifier, params: dict, message: dict):
-    # Message is only needed by the cache; it's already serialized in params.
-    logging.debug('CACHE MISS %s', type(target))
-    return target.send(**params)
+@cached(TTLCache(2048, 86400), key=cache_key, lock=Lock())
+def cached_send(send: Callable, params: dict, message: dict, raw: str):
+    # Message is only needed by the cache; raw is what gets sent.
+    if DEBUG_LOG:
+        logging.debug('CACHE MISS %s', send)
+    return send(message=raw)
 
 
-def cacheable_send(target: Notifier, params: dict, message: Message):
+def cacheable_send(send: Callable, params: dict, message: Message,
+                   as_bytes: bool = False):
+    raw = message.bytes() if as_bytes else message.str()
+    if not params.get('cache_key'):
+        return send(message=raw)
     try:
-        message = message.dict()
-        if params.get('cache_key'):
-            logging.debug('CACHE_ATTEMPT %s', type(target))
-            return cached_send(target, params, message)
-        else:
-            logging.debug("CACHE SKIP %s", type(target))
-            return target.send(**params)
+        if DEBUG_LOG:
+            logging.debug('CACHE_ATTEMPT %s', send)
+        return cached_send(send, params, message.dict(), raw)
     except Exception as e:
-        logging.debug('CACHE MISS EXCEPTION: %s', e)
-        return target.send(**params)
+        if DEBUG_LOG:
+            logging.debug('CACHE MISS EXCEPTION: %s', e)
+        return send(message=raw)
+
+
+def _id_from_record(message: Message, key: str, default: int) -> int:
+    try:
+        record = message.dict()
+    except (TypeError, ValueError) as e:
+        # Message is probably not converatble to a dict.
+        if DEBUG_MODE:
+            print('Message is not a record?: {}'.format(e))
+        return default
+    return (isinstance(record, dict) and record.get(key)) or default
+
+
+def _id_from_text(message: Message, key: str, default: int) -> int:
+    # Only an object can carry an ID, so don't try to parse anything else.
+    if message.raw.lstrip()[:1] not in ('{', b'{'):
+        return default
+    return _id_from_record(message, key, default)
+
+
+# Keyed by the type of Message.raw. Types not found here are tried as records.
+_RECORD_ID_HANDLERS = {
+    dict: lambda m, key, default: m.raw.get(key) or default,
+    str: _id_from_text,
+    bytes: _id_from_text,
+    int: lambda m, key, default: default,
+    float: lambda m, key, default: default,
+    type(None): lambda m, key, default: default,
+}  # type: Dict[type, Callable[[Message, str, int], int]]
+
+
+def record_id(message: Message, key: str, default: int) -> int:
+    return _RECORD_ID_HANDLERS.get(type(message.raw), _id_from_record)(
+        message, key, default)
+
+
+def stage_send(nt: NotifierTracker, message: Message, key: str):
+    params = nt.builder(nt)
+    nt.msg_count += 1
+    response = cacheable_send(nt.send, params, message, nt.accepts_bytes)
+    # Message.dict() memoizes, so stages share a single parse.
+    nt.last_id = record_id(message, key, nt.last_id)
+    return response
+
+
+def batch_send(nt: NotifierTracker, messages: List) -> None:
+    # Refreshes are checked per batch rather than per message.
+    params = nt.builder(nt)
+    nt.msg_count += len(messages)
+    params = {k: v for k, v in params.items() if k != 'message'}
+    nt.target.send_batch(messages, **params)
+    if hasattr(nt.target, 'finish'):
+        nt.target.finish()
+
+
+def finish_targets(pipeline: List[NotifierTracker]) -> None:
+    """Delivers anything targets are holding back for a batch."""
+    for nt in pipeline:
+        if hasattr(nt.target, 'finish'):
+            nt.target.finish()
+
+
+def buffered_recv(recv_many: Callable) -> Callable:
+    """Adapts a Listener's recv_many() to a recv() that returns one message
+    at a time from each block."""
+    pending = deque()  # type: deque
+
+    def recv():
+        if not pending:
+            pending.extend(recv_many())
+        return pending.popleft() if pending else None
+
+    return recv
+
+
+def prefetching_recv(recv: Callable, size: int, wait: float) -> Callable:
+    """Calls `recv` on a thread that stays up to `size` messages ahead, so
+    receiving overlaps with sending. The returned recv() waits up to `wait`
+    seconds for a message, and returns None if there isn't one yet."""
+    ahead = queue.Queue(size)  # type: queue.Queue
+
+    def read():
+        while True:
+            try:
+                message = recv()
+            except BaseException as e:
+                # Includes StopIteration; the caller raises it in turn.
+                ahead.put(e)
+                return
+            if message:
+                ahead.put(message)
+            else:
+                sleep(wait)
+
+    Thread(target=read, daemon=True).start()
+
+    def get():
+        try:
+            message = ahead.get(timeout=wait)
+        except queue.Empty:
+            return None
+        if isinstance(message, BaseException):
+            raise message
+        return message
+
+    return get
 
 
 def main():
@@ -230,17 +422,15 @@ def main():
 
     try:
         listener = config.factory(
-            {**config.get('listener', {}),
-             **{'package': 'cranial.listeners', 'class': 'Listener'}})
+            {**config.get('listener', {}), **LISTENER_PARAMS})
     except TypeError as e:
         listener = config.get('listener')
         if type(listener) is str:
             # Maybe it's a filename?
             listener = dieIf("Listener not properly configured",
                              config.factory,
-                             {'package': 'cranial.listeners',
+                             {**LISTENER_PARAMS,
                               'module': 'file',
-                              'class': 'Listener',
                               'path': listener})
         else:
             raise(e)
@@ -250,17 +440,16 @@ def main():
         listener = dieIf("Listener not properly configured",
                          config.factory,
                          {**config.get('listener'),
-                          **{'package': 'cranial.listeners',
-                             'class': 'Listener',
-                             'module': 'file',
-                             'path': listener_str}})
+                          **LISTENER_PARAMS,
+                          'module': 'file',
+                          'path': listener_str})
 
     try:
         last_id = int(config.get('listener', {}).get('last_id', 0))
     except AttributeError:
         last_id = int(config.get('last_id', 0))
 
-    now = time()
+    now = monotonic()
     pipeline = []  # type: List[NotifierTracker]
     for p in config.get('pipeline', []):
         uri = ''
@@ -277,61 +466,144 @@ def main():
     # @TODO Use importlib to config by string
     serde = json
 
-    if config.get('debug'):
+    # Options are fixed once loaded, so read them once, not per message.
+    echo = config.get('echo', False)
+    include_empty = config.get('include_empty')
+    show_response = config.get('response', False)
+    update = config.get('update')
+
+    batch_size = int(config.get('batch') or 1)
+    batching = batch_size > 1 and len(pipeline) == 1 \
+        and not show_response and not update \
+        and not (isinstance(params, dict) and params.get('cache_key'))
+    batch = []  # type: List[str]
+    batch_started = 0.0
+    key = config.get('key', 'id')
+
+    # Stages are independent when fanning out, so send to them concurrently.
+    pool = None
+    if config.get('fanout') and len(pipeline) > 1 and not update:
+        pool = ThreadPoolExecutor(len(pipeline))
+
+    # Listeners that can hand over what they decoded along with its original
+    # form spare us encoding it again.
+    if hasattr(listener, 'messages'):
+        listener.messages = True
+
+    # Bound once, rather than looked up for every message. Listeners that can
+    # read many messages at a time are read that way, and wait for them
+    # themselves, returning nothing when the listener is idle.
+    waits = hasattr(listener, 'recv_many')
+    recv = buffered_recv(partial(listener.recv_many, wait=sleep_time)) \
+        if waits else listener.recv
+    # A prefetching recv() does its own waiting when the listener is idle.
+    prefetch = int(config.get('prefetch') or 0)
+    if prefetch and listener.commits_on_recv:
+        # Reading ahead would acknowledge messages before they're sent.
+        logging.warning('Not prefetching: %s commits as it receives.',
+                        type(listener).__module__)
+        prefetch = 0
+    if batching and listener.commits_on_recv:
+        # Likewise, messages held for a batch may be acknowledged unsent.
+        logging.warning('Not batching: %s commits as it receives.',
+                        type(listener).__module__)
+        batching = False
+    if prefetch:
+        recv = prefetching_recv(recv, prefetch, sleep_time)
+
+    # When the listener can be waited on, idle until it has input instead of
+    # sleeping for the whole interval.
+    selector = None
+    if not prefetch and not waits and listener.fileno() is not None:
+        selector = selectors.DefaultSelector()
+        selector.register(listener.fileno(), selectors.EVENT_READ)
+    sleep_count = 0
+
+    # One write per line, where print() makes two. Output is flushed when
+    # the listener goes idle, rather than per message.
+    write = sys.stdout.write
+
+    if DEBUG_MODE:
         timer = time()
-    while True:  # noqa
-        try:
-            message = Message(listener.recv(), serde=serde)
-
-            if config.get('echo', False):
-                print(message.str().strip())
-            if not config.get('include_empty') and message.str().strip() == '':
-                continue
-        except StopIteration:
-            break
-
-        if message.raw:
-            logging.debug('Received Message: %s', message)
-
-            # Sending...
-            for nt in pipeline:  # type: NotifierTracker
-                nt.target, params, nt.msg_count, nt.connect_time = nt.builder(
-                    nt.target, nt.msg_count, nt.connect_time, nt.last_id)
-                nt.msg_count += 1
-                params['message'] = message.str()
-                response = cacheable_send(nt.target, params, message)
-                if response and config.get('response', False):
-                    print(response)
-
-                try:
-                    # @TODO this is probably slowing us down unnecessarly, and it's
-                    # ugly.
-                    nt.last_id = message.dict().get(
-                        config.get('key', 'id')) or nt.last_id
-                except (TypeError, ValueError) as e:
-                    # Message is probably not converatble to a dict.
-                    if config.get('debug'):
-                        print('Message is not a record?: {}'.format(e))
-                    pass
-
-                if response and config.get('update'):
-                    message = message_update(message, Message(response))
-                elif response:
-                    message = Message(response)
-
-            if config.get('update') and config.get('response'):
-                print(message.str())
-
-            # End sending.
-            sleep_count = 0
-        else:
-            sleep(sleep_time)
-            sleep_count += 1
-            if sleep_count % 5 == 0:
-                logging.debug("No messages for %s seconds",
-                              sleep_count * sleep_time)
-
-    if config.get('debug'):
+    try:
+        while True:  # noqa
+            try:
+                message = recv()
+                if type(message) is not Message:
+                    message = Message(message, serde=serde)
+                text = message.str()
+
+                if echo and message.raw is not None:
+                    write(text.strip() + '\n')
+                if not include_empty and (not text or text.isspace()):
+                    continue
+            except StopIteration:
+                break
+
+            if DEBUG_LOG and message.raw:
+                logging.debug('Received Message: %s', text)
+
+            if message.raw and batching:
+                nt = pipeline[0]
+                # Once the target is known to take bytes, hand it the form the
+                # serde produced rather than encoding the text again.
+                if not batch:
+                    batch_started = monotonic()
+                batch.append(message.bytes() if nt.accepts_bytes else text)
+                nt.last_id = record_id(message, key, nt.last_id)
+                # A trickle of messages mustn't hold a partial batch for long.
+                if len(batch) >= batch_size or \
+                        monotonic() - batch_started >= sleep_time:
+                    batch_send(nt, batch)
+                    batch = []
+                sleep_count = 0
+            elif message.raw and pool:
+                send = partial(stage_send, message=message, key=key)
+                for response in pool.map(send, pipeline):
+                    if response and show_response:
+                        write('{}\n'.format(response))
+                sleep_count = 0
+            elif message.raw:
+                # Sending...
+                for nt in pipeline:  # type: NotifierTracker
+                    response = stage_send(nt, message, key)
+                    if response and show_response:
+                        write('{}\n'.format(response))
+
+                    if response and update:
+                        message = message_update(
+                            message, Message(response, serde=serde), serde)
+                    elif response:
+                        message = Message(response, serde=serde)
+
+                if update and show_response:
+                    write(message.str() + '\n')
+
+                # End sending.
+                sleep_count = 0
+            else:
+                # Don't hold a partial batch while the listener is idle.
+                if batch:
+                    batch_send(pipeline[0], batch)
+                    batch = []
+                if sleep_count == 0:
+                    finish_targets(pipeline)
+                sys.stdout.flush()
+                if selector:
+                    selector.select(sleep_time)
+                elif not prefetch and not waits:
+                    sleep(sleep_time)
+                sleep_count += 1
+                if DEBUG_LOG and sleep_count % 5 == 0:
+                    logging.debug("No messages for %s seconds",
+                                  sleep_count * sleep_time)
+    finally:
+        # Also on KeyboardInterrupt, so nothing held for a batch is lost.
+        if batch:
+            batch_send(pipeline[0], batch)
+        finish_targets(pipeline)
+
+    if DEBUG_MODE:
         print('Loop time: {}'.format(time() - timer))
 
 
@@ -1,7 +1,13 @@
 from abc import ABCMeta, abstractmethod
-from typing import Any, Dict, List, Union  # noqa
+import os
+from typing import Any, Dict, List, Optional, Union  # noqa
 
 import yaml
+try:
+    # libyaml, when PyYAML was built with it.
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader  # type: ignore
 
 from cranial.common.config import parse_uri, factory
 from cranial.listeners.base import Listener  # noqa
@@ -33,8 +39,11 @@ class Discovery(metaclass=ABCMeta):
         raise Exception('Not Implemented')
 
     def get_metadata(self, service: str, key: str) -> ServiceValue:
-        assert service in self.services
-        return self.services[service][key]
+        try:
+            definition = self.services[service]
+        except KeyError:
+            raise KeyError('Unknown service: {}'.format(service)) from None
+        return definition[key]
 
     def get_instances(self, service: str) -> List[str]:
         return self.get_metadata(service, 'hosts')  # type: ignore
@@ -54,9 +63,16 @@ class PythonDiscovery(Discovery):
 
 
 class YamlFileDiscovery(Discovery):
+    mtime = None  # type: Optional[float]
+
     def update(self):
+        # Only reparse when the file has changed since the last update.
+        mtime = os.stat(self.namespace).st_mtime
+        if mtime == self.mtime:
+            return
         with open(self.namespace) as f:
-            self.services = yaml.full_load(f)
+            self.services = yaml.load(f, Loader=YamlLoader)
+        self.mtime = mtime
 
 
 class YamlListenerDiscovery(Discovery):
@@ -67,4 +83,4 @@ class YamlListenerDiscovery(Discovery):
             self.listener = factory(params)  # type: Listener
         msg = self.listener.recv()
         if msg:
-            self.services = yaml.full_load(msg)
+            self.services = yaml.load(msg, Loader=YamlLoader)
@@ -1,5 +1,9 @@
+from cachetools import cached, TTLCache
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from time import time
+from requests.adapters import HTTPAdapter
+from threading import Lock
+from time import monotonic
 from typing import Any, Callable, Dict, List, Optional  # noqa
 
 from cranial.common import logger
@@ -9,10 +13,35 @@ log = logger.get()
 
 MARATHON_URL = 'http://marathon.mesos:8080/v2/apps'
 
+# Keeps the connection to Marathon alive between requests.
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+session.mount('http://', _adapter)
+session.mount('https://', _adapter)
+
+
+@cached(TTLCache(256, .5), lock=Lock())
+def get_app(service_id: str) -> Dict:
+    """The Marathon definition of a service. Cached for as long as
+    Discovery.update() waits between updates, so callers in that window
+    share a single request."""
+    return session.get(MARATHON_URL + service_id).json()['app']
+
+
+# Bounded, so a large update doesn't flood Marathon with requests.
+_pool = ThreadPoolExecutor(8)
+
+
+def get_apps(service_ids: List[str]) -> List[Dict]:
+    """get_app() for each service, fetched concurrently, in order."""
+    if len(service_ids) < 2:
+        return [get_app(s) for s in service_ids]
+    return list(_pool.map(get_app, service_ids))
+
 
 def get_services_with_predicate(predicate: Callable) -> List:
     """Return a list of all Marathon Services that satisfy the predicate."""
-    response = requests.get(MARATHON_URL)
+    response = session.get(MARATHON_URL)
     if response.status_code == requests.codes.ok:
         services = [x for x in response.json()['apps'] if predicate(x)]
         if log:
@@ -30,8 +59,7 @@ def get_tasks_for_service(service_id: str, portIndex: int = 0) -> List[str]:
     The service_id is the string including the leading /, as given by the 'id'
     field for the service definition.
     """
-    response = requests.get(MARATHON_URL + service_id)
-    app = response.json()['app']
+    app = get_app(service_id)
     result = []
     for task in app['tasks']:
         # Assume healthy if health checks aren't defined.
@@ -69,9 +97,7 @@ def get_tasks_by_label(label: str, log='IGNORED') -> dict:
         lambda x: label in x['labels'].keys())
     if services:
         service_ids = [x['id'] for x in services]
-        for s in service_ids:
-            response = requests.get(MARATHON_URL + s)
-            app = response.json()['app']
+        for s, app in zip(service_ids, get_apps(service_ids)):
             value = app['labels'][label]
             if value not in result:
                 result[value] = {}
@@ -97,24 +123,20 @@ def get_service_port(hostname: str, port_only=False):
 
 
 class Discovery(base.Discovery):
-    time = 0
+    next_update = 0.0
 
     def update(self):
         # Don't spam the service discovery.
-        if time() - self.time < .5:
+        if monotonic() < self.next_update:
             return
 
-        self.time = time()
+        self.next_update = monotonic() + .5
         services = get_services_with_predicate(
           lambda x: self.namespace in x['labels'].keys())
-        for s in services:
-            response = requests.get(MARATHON_URL + s.id)
-            app = response.json()['app']
-            mode = app['labels'][self.namespace]
-            proto = app['labels'].get('NOTIFIER', 'kafka')
-            self.services[s.id] = {'mode': mode,
-                                   'protocol': proto,
-                                   'hosts': []}
+        service_ids = [x['id'] for x in services]
+        current = {}  # type: base.ServiceRegistry
+        for s, app in zip(service_ids, get_apps(service_ids)):
+            hosts = []
             for task in app['tasks']:
                 address = task['host']
                 # @TODO fix this hack for rabbitmq.
@@ -122,6 +144,19 @@ class Discovery(base.Discovery):
                     address += ':5672'
                 elif len(task.get('ports', [])):
                     address += ':' + str(task['ports'][0])
-                self.services[s.id]['hosts'].append(address)
+                hosts.append(address)
+            current[s] = {'mode': app['labels'][self.namespace],
+                          'protocol': app['labels'].get('NOTIFIER', 'kafka'),
+                          'hosts': hosts}
+
+        # Update in place, so only services that changed are replaced, and
+        # those Marathon no longer has are dropped rather than kept forever.
+        # Nothing at all may mean Marathon failed to answer, so keep them.
+        if current:
+            for s in [s for s in self.services if s not in current]:
+                del self.services[s]
+        for s, definition in current.items():
+            if self.services.get(s) != definition:
+                self.services[s] = definition
 
         log.debug(self.services)
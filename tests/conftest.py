@@ -0,0 +1,6 @@
+import pathlib
+import sys
+
+# Make the package importable wherever the tests are run from, once per
+# session rather than in each test module.
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
@@ -1,33 +1,50 @@
-from concurrent.futures import Future
+from concurrent.futures import as_completed, Future
 import io
-import sys
+import os
 import time
 import unittest
 
 from cranial.connectors.base import Connector
 
-sys.path.append('.')    # in case file is run from root dir
+# Seconds DummyConnector takes per get/put. Set DUMMY_DELAY to simulate a
+# slow connector; by default the tests don't wait on it.
+DELAY = float(os.environ.get('DUMMY_DELAY', '0'))
+
+# Seconds per get/put for the tests that check gets and puts overlap.
+BLOCK_DELAY = DELAY or 0.1
 
 
 class DummyConnector(Connector):
-    def __init__(self):
-        pass
+    def __init__(self, delay=DELAY):
+        self.delay = delay
 
     def get(self, name=None):
         s = 'some string and name={}'.format(name)
-        time.sleep(0.5)
+        if self.delay:
+            time.sleep(self.delay)
         return io.BytesIO(s.encode())
 
     def put(self, stream, name=None):
-        time.sleep(0.5)
+        if self.delay:
+            time.sleep(self.delay)
         return isinstance(stream, io.BytesIO)
 
 
 class TestConnector(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Shared, so the tests reuse one Connector's thread pool.
+        cls.c = DummyConnector()
+        cls.slow = DummyConnector(delay=BLOCK_DELAY)
+
+    @classmethod
+    def tearDownClass(cls):
+        for c in (cls.c, cls.slow):
+            if hasattr(c, 'pool'):
+                c.pool.shutdown()
 
     def test_connector_get(self):
-        c = DummyConnector()
-        actual = c.get(name='blah').read().decode()
+        actual = self.c.get(name='blah').read().decode()
         expected = 'some string and name=blah'
         self.assertEqual(
             actual,
@@ -36,17 +53,15 @@ class TestConnector(unittest.TestCase):
             "and name passed into the method")
 
     def test_connector_put(self):
-        c = DummyConnector()
-        actual = c.put(io.BytesIO(b'some string'), name='blah')
+        actual = self.c.put(io.BytesIO(b'some string'), name='blah')
         self.assertTrue(
             actual,
             "should return True that input is an instance of io.BytesIO")
 
     def test_toStream(self):
-        c = DummyConnector()
         actual = [
-            isinstance(c.toStream('lala'), io.StringIO),
-            isinstance(c.toStream(b'lala'), io.BytesIO),
+            isinstance(self.c.toStream('lala'), io.StringIO),
+            isinstance(self.c.toStream(b'lala'), io.BytesIO),
         ]
         expected = [True, True]
         self.assertListEqual(
@@ -55,17 +70,13 @@ class TestConnector(unittest.TestCase):
             "StringIO")
 
     def test_getFuture(self):
-        c = DummyConnector()
-        f = c.getFuture(name='blah')
+        f = self.c.getFuture(name='blah')
         actual = isinstance(f, Future)
         self.assertTrue(actual, "should return an instance of Future")
 
     def test_getFuture_result(self):
-        c = DummyConnector()
-        f = c.getFuture(name='blah')
-        while not f.done():
-            time.sleep(0.1)
-        actual = f.result().read().decode()
+        f = self.c.getFuture(name='blah')
+        actual = f.result(timeout=5).read().decode()
         expected = 'some string and name=blah'
         self.assertEqual(
             actual, expected,
@@ -73,30 +84,35 @@ class TestConnector(unittest.TestCase):
             "and name passed into the method")
 
     def test_putFuture(self):
-        c = DummyConnector()
-        f = c.putFuture(io.BytesIO(b'some string'), name='blah')
+        f = self.c.putFuture(io.BytesIO(b'some string'), name='blah')
         actual = isinstance(f, Future)
         self.assertTrue(actual, "should return an instance of Future")
 
     def test_putFuture_result(self):
-        c = DummyConnector()
-        f = c.putFuture(io.BytesIO(b'some string'), name='blah')
-        while not f.done():
-            time.sleep(0.1)
-        actual = f.result()
+        f = self.c.putFuture(io.BytesIO(b'some string'), name='blah')
+        actual = f.result(timeout=5)
         self.assertTrue(actual, "result should be True")
 
     def test_getMultiple_no_block(self):
-        c = DummyConnector()
-        res = c.getMultiple({'a': 'a', 'b': 'b'}, blocking=False)
+        res = self.c.getMultiple({'a': 'a', 'b': 'b'}, blocking=False)
         actual = {k: isinstance(v, Future) for k, v in res.items()}
         expected = {'a': True, 'b': True}
         self.assertDictEqual(
             actual, expected, "should return a dictionary with futures")
 
+        # Reaped in whatever order they finish.
+        results = {f.result().read().decode()
+                   for f in as_completed(res.values(), timeout=5)}
+        self.assertSetEqual(
+            results,
+            {'some string and name=a', 'some string and name=b'},
+            "futures should resolve to the streams")
+
     def test_getMultiple_block(self):
-        c = DummyConnector()
-        res = c.getMultiple({'a': 'a', 'b': 'b'}, blocking=True)
+        start = time.monotonic()
+        res = self.slow.getMultiple({'a': 'a', 'b': 'b'}, blocking=True)
+        self.assertLess(time.monotonic() - start, 2 * BLOCK_DELAY,
+                        "should get concurrently")
         actual = {k: v.read().decode() for k, v in res.items()}
         expected = {
             'a': 'some string and name=a',
@@ -106,8 +122,7 @@ class TestConnector(unittest.TestCase):
             actual, expected, "should return a dictionary with streams")
 
     def test_putMultiple_no_block(self):
-        c = DummyConnector()
-        res = c.putMultiple({
+        res = self.c.putMultiple({
             'a': io.BytesIO(b'some string'),
             'b': ['some string', 'b']   # << two args
         }, blocking=False)
@@ -118,11 +133,13 @@ class TestConnector(unittest.TestCase):
             actual, expected, "should return a dictionary with futures")
 
     def test_putMultiple_block(self):
-        c = DummyConnector()
-        res = c.putMultiple({
+        start = time.monotonic()
+        res = self.slow.putMultiple({
             'a': io.BytesIO(b'some string'),
             'b': ['some string', 'b']   # << two args
         }, blocking=True)
+        self.assertLess(time.monotonic() - start, 2 * BLOCK_DELAY,
+                        "should put concurrently")
 
         actual = res
         expected = {
@@ -0,0 +1,78 @@
+import os
+import tempfile
+from threading import Thread
+import time
+import unittest
+
+from cranial.messaging.file import Notifier
+
+
+class TestFileNotifier(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def read(self, name):
+        with open(self.path(name)) as f:
+            return f.read()
+
+    def test_closes_least_recently_used(self):
+        n = Notifier(max_open=2)
+        n.send(path=self.path('a'), message='1')
+        n.send(path=self.path('b'), message='2')
+        n.send(path=self.path('a'), message='3')
+        n.send(path=self.path('c'), message='4')
+        self.assertEqual(list(n.logfiles),
+                         [self.path('a'), self.path('c')],
+                         'should close the least recently used file')
+        self.assertEqual(self.read('b'), '2\n',
+                         'should flush a file as it closes it')
+
+    def test_reopen_appends(self):
+        n = Notifier(max_open=1)
+        n.send(path=self.path('a'), message='1')
+        n.send(path=self.path('b'), message='2')
+        n.send(path=self.path('a'), message='3')
+        n.finish()
+        self.assertEqual(self.read('a'), '1\n3\n',
+                         'should append to a file it closed, not truncate')
+
+    def test_refresh_appends(self):
+        n = Notifier()
+        n.send(path=self.path('a'), message='1')
+        n.refresh()
+        n.send(path=self.path('a'), message='2')
+        n.finish()
+        self.assertEqual(self.read('a'), '1\n2\n')
+
+    def test_concurrent_send_and_finish(self):
+        n = Notifier(max_open=4)
+        stop = time.monotonic() + 0.5
+        errors = []
+
+        def send():
+            i = 0
+            while time.monotonic() < stop:
+                n.send(path=self.path(str(i % 8)), message='x')
+                i += 1
+
+        def finish():
+            while time.monotonic() < stop:
+                try:
+                    n.finish()
+                except RuntimeError as e:
+                    errors.append(e)
+
+        threads = [Thread(target=f) for f in (send, send, finish)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import time
+import unittest
+from unittest import mock
+
+from cranial.messaging import firehose
+
+
+class TestFirehoseNotifier(unittest.TestCase):
+    def setUp(self):
+        # Records each request as (stream, number of records); none rejected.
+        self.requests = []
+        patcher = mock.patch.object(
+            firehose.firehose, 'put_records',
+            side_effect=lambda stream, records:
+                self.requests.append((stream, len(records))) or [])
+        self.put_records = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batches_until_full(self):
+        n = firehose.Notifier(linger=60)
+        with mock.patch.object(firehose, 'MAX_RECORDS', 3):
+            for i in range(7):
+                self.assertTrue(n.send(None, str(i), 's'))
+        self.assertEqual(self.requests, [('s', 3), ('s', 3)],
+                         'should send each full batch in one request')
+        self.assertEqual(n.finish(), [])
+        self.assertEqual(self.requests[-1], ('s', 1),
+                         'finish() should send the remainder')
+
+    def test_batches_until_max_bytes(self):
+        n = firehose.Notifier(linger=60)
+        with mock.patch.object(firehose, 'MAX_BYTES', 10):
+            for _ in range(3):
+                n.send(None, 'abcd', 's')  # 5 bytes, with the newline.
+        self.assertEqual(self.requests, [('s', 2)],
+                         'should not let a batch exceed MAX_BYTES')
+        n.finish()
+
+    def test_streams_batch_separately(self):
+        n = firehose.Notifier(linger=60)
+        n.send(None, 'a', 's')
+        n.send(None, 'b', 't')
+        n.send(None, 'c', 's')
+        self.assertEqual(n.finish(), [])
+        self.assertCountEqual(self.requests, [('s', 2), ('t', 1)])
+
+    def test_linger(self):
+        n = firehose.Notifier(linger=0.1)
+        n.send(None, 'a', 's')
+        self.assertEqual(self.requests, [], 'should hold a partial batch')
+        time.sleep(0.3)
+        self.assertEqual(self.requests, [('s', 1)],
+                         'should send a batch once it has lingered')
+        self.assertEqual(n.buffers, {})
+
+    def test_rejected(self):
+        self.put_records.side_effect = lambda stream, records: records
+        n = firehose.Notifier(linger=60)
+        n.send(None, 'a', 's')
+        self.assertEqual(n.finish(), ['s'],
+                         'should name streams with undelivered records')
+        with mock.patch.object(firehose, 'MAX_RECORDS', 1):
+            self.assertFalse(n.send(None, 'b', 's'),
+                             'should fail a send whose batch was rejected')
+
+    def test_exit(self):
+        n = firehose.Notifier(linger=60)
+        n.send(None, 'a', 's')
+        firehose._finish_all()
+        self.assertEqual(self.requests, [('s', 1)],
+                         'should send what remains at exit')
+
+
+if __name__ == '__main__':
+    unittest.main()
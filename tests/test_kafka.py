@@ -0,0 +1,94 @@
+import unittest
+from unittest import mock
+
+from cranial.listeners.kafka import Listener
+from cranial.messaging.adapters import kafka
+
+
+class FakeMessage:
+    def __init__(self, offset, value=b'', error=None, partition=0):
+        self._offset = offset
+        self._value = value
+        self._error = error
+        self._partition = partition
+
+    def topic(self):
+        return 't'
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+    def value(self):
+        return self._value
+
+    def error(self):
+        return self._error
+
+
+class FakeConsumer:
+    def __init__(self, *batches):
+        self.batches = list(batches)
+
+    def subscribe(self, topics):
+        pass
+
+    def consume(self, num_messages, timeout):
+        return self.batches.pop(0)[:num_messages] if self.batches else []
+
+
+class TestListenerRecvMany(unittest.TestCase):
+    def test_batches(self):
+        listener = Listener('t', consumer=FakeConsumer(
+            [FakeMessage(0, b'a'), FakeMessage(1, b'b')]))
+        self.assertEqual(listener.recv_many(wait=0), [b'a', b'b'])
+        self.assertEqual(listener.recv_many(wait=0), [],
+                         'should return nothing when the topic is idle')
+
+    def test_errors(self):
+        listener = Listener('t', consumer=FakeConsumer(
+            [FakeMessage(0, b'a'), FakeMessage(1, error='oops')],
+            [FakeMessage(2, error='oops')]))
+        with self.assertLogs('kafka_client', 'WARNING'):
+            self.assertEqual(listener.recv_many(wait=0), [b'a'],
+                             'should skip errors')
+        with self.assertRaises(Exception):
+            listener.recv_many(wait=0, do_raise=True)
+
+
+class TestCarefulConsumer(unittest.TestCase):
+    def setUp(self):
+        self.batches = [
+            [FakeMessage(0), FakeMessage(1), FakeMessage(5, partition=1)],
+            [FakeMessage(2)]]
+        self.committed = []
+        for name, fake in [
+                ('consume', lambda c, n, t: self.batches.pop(0)),
+                ('commit', lambda c, *args, **kwargs: self.committed.append(
+                    sorted((tp.partition, tp.offset)
+                           for tp in kwargs['offsets']))),
+                ('close', lambda c: None)]:
+            patcher = mock.patch.object(kafka.MustCommitConsumer, name, fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.consumer = kafka.CarefulConsumer({'group.id': 'test'})
+
+    def test_commits_previous_batch(self):
+        self.consumer.consume(10, 0)
+        self.assertEqual(self.committed, [],
+                         'should not commit a batch as it is returned')
+        self.consumer.consume(10, 0)
+        self.assertEqual(self.committed, [[(0, 2), (1, 6)]],
+                         "should commit past each partition's latest")
+
+    def test_close(self):
+        self.consumer.consume(10, 0)
+        self.consumer.close()
+        self.assertEqual(self.committed, [],
+                         'should leave an unfinished batch uncommitted')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,20 @@
 import io
-import sys
+import os
 import tempfile
 import unittest
 
 from cranial.connectors.local import Connector
 
-sys.path.append('.')  # in case file is run from root dir
+# Memory backed, where available, so temp files never wait on a disk.
+TMP_DIR = '/dev/shm' if os.access('/dev/shm', os.W_OK) else None
 
 
 class TestLocalConnector(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cb = Connector('/')
+        cls.c = Connector('/', binary=False)
+
     def test_connector_init(self):
         c1 = Connector()
         c2 = Connector(path='temp_dir')
@@ -18,13 +24,12 @@ class TestLocalConnector(unittest.TestCase):
                          "should take path or use an empty string")
 
     def test_get(self):
-        tf = tempfile.NamedTemporaryFile()
+        tf = tempfile.NamedTemporaryFile(dir=TMP_DIR)
         expected = b'blah'
         tf.file.write(expected)  # type: ignore
         tf.file.flush()  # type: ignore
 
-        c = Connector(path='/')
-        actual = c.get(name=tf.name).read()
+        actual = self.cb.get(name=tf.name).read()
         tf.close()
         self.assertEqual(actual, expected, 'should read a temp file')
 
@@ -32,69 +37,54 @@ class TestLocalConnector(unittest.TestCase):
         # @TODO I don't remember why we thought this was a good idea.
         # We should probably raise most Exceptions.
         c = Connector(binary=False)
-        actual = c.get(name='non-existing-file').read()
+        with self.assertLogs('local_fetchers', 'ERROR') as logs:
+            actual = c.get(name='non-existing-file').read()
         self.assertEqual(actual, '', 'should return an empty string')
+        self.assertEqual(len(logs.output), 1, 'should try to open it once')
 
     def test_get_binary(self):
-        tf = tempfile.NamedTemporaryFile(mode='rb')
+        tf = tempfile.NamedTemporaryFile(mode='rb', dir=TMP_DIR)
         with open(tf.name, 'wb') as f:
             f.write(b'blah')
 
-        c = Connector('/')
-        actual = c.get(name=tf.name).read()
+        actual = self.cb.get(name=tf.name).read()
         expected = b'blah'
         tf.close()
         self.assertEqual(actual, expected, 'should read a temp file')
 
     def test_get_bad_name_binary(self):
         c = Connector(binary=True)
-        actual = c.get(name='non-existing-file').read()
+        with self.assertLogs('local_fetchers', 'ERROR') as logs:
+            actual = c.get(name='non-existing-file').read()
         expected = b''
         self.assertEqual(actual, expected, 'should return an empty string')
+        self.assertEqual(len(logs.output), 1, 'should try to open it once')
 
-    def test_put_result(self):
-        tfb = tempfile.NamedTemporaryFile(mode='rb')
-        tf = tempfile.NamedTemporaryFile(mode='r')
-        cb = Connector('/')
-        c = Connector('/', binary=False)
-        actual = [
-            cb.put(io.BytesIO(b'blah'), name=tfb.name),
-            cb.put(b'blah', name=tfb.name),
-            cb.put(42, name=tfb.name),
-            c.put(io.StringIO('blah'), name=tf.name),
-            c.put('blah', name=tf.name),
-            c.put(42, name=tf.name)
+    def test_put(self):
+        cases = [
+            (self.cb, 'rb', [io.BytesIO(b'blah'), b'blah', 42], b'blah'),
+            (self.c, 'r', [io.StringIO('blah'), 'blah', 42], 'blah'),
         ]
-        expected = [True, True, False, True, True, False]
-        tfb.close()
-        tf.close()
-        self.assertListEqual(
-            actual, expected, 'should do two good writes and one failed')
-
-    def test_put_check_written(self):
-        tfb = tempfile.NamedTemporaryFile(mode='rb')
-        tf = tempfile.NamedTemporaryFile(mode='r')
-        cb = Connector('/')
-        c = Connector('/', binary=False)
-
-        _ = [
-            cb.put(io.BytesIO(b'blah'), name=tfb.name),
-            cb.put(b'blah', name=tfb.name),
-            cb.put(42, name=tfb.name),
-            c.put(io.StringIO('blah'), name=tf.name),
-            c.put('blah', name=tf.name),
-            c.put(42, name=tf.name)
-        ]
-        with open(tfb.name, 'rb') as f:
-            resb = f.read()
-
-        with open(tf.name, 'r') as f:  # type: ignore
-            res = f.read()
-        actual = [resb, res]
-        expected = [b'blah', 'blah']
-        tfb.close()
-        tf.close()
-        self.assertListEqual(actual, expected, 'should over-write blah')
+        for c, mode, sources, expected_content in cases:
+            with self.subTest(binary=c.binary):
+                tf = tempfile.NamedTemporaryFile(mode=mode, dir=TMP_DIR)
+                actual = [c.put(source, name=tf.name) for source in sources]
+                with open(tf.name, mode) as f:
+                    content = f.read()
+                tf.close()
+                self.assertListEqual(
+                    actual, [True, True, False],
+                    'should do two good writes and one failed')
+                self.assertEqual(content, expected_content,
+                                 'should over-write blah')
+
+    def test_put_failure_cleans_up(self):
+        with tempfile.TemporaryDirectory(dir=TMP_DIR) as d:
+            with self.assertLogs('local_fetchers', 'ERROR'):
+                actual = self.c.put(b'not text', name=d + '/out')
+            self.assertFalse(actual)
+            self.assertEqual(os.listdir(d), [],
+                             'should remove its temp file')
 
 
 if __name__ == '__main__':
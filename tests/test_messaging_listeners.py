@@ -1,31 +1,81 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 
-import socket
-from contextlib import closing
+import os
 
+from cranial.listeners import stdin
 from cranial.listeners.zmq import Listener
 from cranial.messaging import Messenger
+from cranial.servicediscovery.base import PythonDiscovery
 
 
-def random_port():
-    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
-        s.bind(('', 0))
-        return s.getsockname()[1]
+def worker_port(base=int(os.environ.get('TEST_PORT', 20000))):
+    """A fixed port per pytest-xdist worker, so parallel workers don't
+    collide. libzmq sets SO_REUSEADDR on the sockets it binds, so reruns can
+    reuse it straight away."""
+    return base + int(os.environ.get('PYTEST_XDIST_WORKER', 'gw0')[2:])
 
 
 class TestMessaging(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # One Listener and Messenger, so each ZMQ test reuses their sockets.
+        cls.port = worker_port()
+        cls.listener = Listener(cls.port)
+
+        services = {str(cls.port): {
+            'hosts': ['localhost:{}'.format(cls.port)],
+            'protocol': 'AsyncZMQ',
+            'mode': 'all'}}
+        cls.messenger = Messenger(endpoint='ignored',
+                                  discovery=PythonDiscovery(services))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.listener.server.close()
+
     def test_zmq(self):
-        port = random_port()
-        listener = Listener(port)
-
-        services = lambda _: {'all': {port: ['localhost:{}'.format(port)]}}
-        protocols = lambda _: {'AsyncZMQ': services('NA')['all']}
-        messenger = Messenger(endpoint='ignored',
-                              label='NA',
-                              service_discovery=services,
-                              protocol_discovery=protocols)
         msg = 'Hello Test.'
-        success = messenger.notify(msg)
-        self.assertEqual(bytes(msg, 'ascii'), listener.recv())
-        listener.resp(b'OK')
+        success = self.messenger.notify(msg)
+        self.assertEqual(bytes(msg, 'ascii'), self.listener.recv())
+        self.listener.resp(b'OK')
         self.assertTrue(success)
+
+
+class TestStdinRecvMany(TestCase):
+    def setUp(self):
+        r, w = os.pipe()
+        self.stdin = open(r, 'rb')
+        self.addCleanup(self.stdin.close)
+        self.writer = open(w, 'wb', buffering=0)
+        self.addCleanup(self.writer.close)
+        patcher = mock.patch('sys.stdin', self.stdin)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.listener = stdin.Listener()
+
+    def write(self, data):
+        self.writer.write(data)
+
+    def test_lines(self):
+        self.write(b'a\nb\nc\n')
+        self.assertEqual(self.listener.recv_many(max=2, wait=1),
+                         [b'a\n', b'b\n'], 'should return up to max')
+        self.assertEqual(self.listener.recv_many(wait=1), [b'c\n'])
+
+    def test_idle(self):
+        self.write(b'partial')
+        self.assertEqual(self.listener.recv_many(wait=0.05), [],
+                         'should not wait past `wait` for a whole line')
+        self.write(b' line\n')
+        self.assertEqual(self.listener.recv_many(wait=1),
+                         [b'partial line\n'])
+
+    def test_end(self):
+        self.write(b'{"a": 1}\nlast')
+        self.writer.close()
+        self.assertEqual(self.listener.recv_many(wait=1), [{'a': 1}],
+                         'should decode JSON')
+        self.assertEqual(self.listener.recv_many(wait=1), [b'last'],
+                         'should return a final unterminated line')
+        with self.assertRaises(StopIteration):
+            self.listener.recv_many(wait=1)
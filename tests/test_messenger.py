@@ -0,0 +1,174 @@
+from collections import Counter
+from threading import Lock, Thread
+import time
+import unittest
+
+from cranial.messaging.base import (Async_Wrapper, Messenger, Notifier,
+                                    NotifyException)
+from cranial.servicediscovery.base import PythonDiscovery
+
+
+class RecordingNotifier(Notifier):
+    """Records each send. Sends to addresses, or of messages, in `fail`
+    return False. Those in `delay` take that many seconds."""
+    thread_safe = True
+
+    def __init__(self, fail=(), delay=None):
+        self.fail = set(fail)
+        self.delay = delay or {}
+        self.sent = []
+        self.lock = Lock()
+
+    def send(self, address, message, endpoint, **kwargs):
+        time.sleep(self.delay.get(address) or self.delay.get(message, 0))
+        with self.lock:
+            self.sent.append(address)
+        return address not in self.fail and message not in self.fail
+
+
+def messenger(notifier, hosts, mode='any', factory=None, **kwargs):
+    services = {'svc': {'hosts': hosts, 'protocol': 'test', 'mode': mode}}
+    return Messenger(endpoint='e', discovery=PythonDiscovery(services),
+                     factory=factory or (lambda proto: notifier), **kwargs)
+
+
+class TestNotifyAny(unittest.TestCase):
+    def test_round_robin(self):
+        n = RecordingNotifier()
+        m = messenger(n, ['a', 'b', 'c'])
+        for _ in range(6):
+            m.notify('hello')
+        self.assertEqual(Counter(n.sent), {'a': 2, 'b': 2, 'c': 2},
+                         'should spread sends evenly over instances')
+        self.assertEqual(n.sent[:3], n.sent[3:],
+                         'should visit instances in a fixed rotation')
+
+    def test_retries_another_instance(self):
+        n = RecordingNotifier(fail={'a', 'b'})
+        m = messenger(n, ['a', 'b'])
+        with self.assertRaises(NotifyException):
+            m.notify('hello')
+        self.assertCountEqual(n.sent, ['a', 'b'],
+                              'should try the other instance once')
+
+
+class TestNotifySingle(unittest.TestCase):
+    def test_fast_path(self):
+        n = RecordingNotifier()
+        m = messenger(n, ['a'])
+        self.assertIsNotNone(m._single_service_fast,
+                             'should take the fast path for one instance')
+        self.assertTrue(m.notify('hello'))
+        self.assertEqual(n.sent, ['a'])
+
+    def test_fast_path_failure(self):
+        n = RecordingNotifier(fail={'a'})
+        m = messenger(n, ['a'])
+        with self.assertRaises(NotifyException):
+            m.notify('hello')
+        self.assertEqual(n.sent, ['a', 'a'], 'should retry once')
+
+    def test_no_fast_path_for_async(self):
+        m = messenger(None, ['a'],
+                      factory=lambda proto: Async_Wrapper(RecordingNotifier()))
+        self.assertIsNone(m._single_service_fast,
+                          'should leave AsyncNotifiers to notify()')
+
+
+class TestNotifyAll(unittest.TestCase):
+    def test_fans_out(self):
+        n = RecordingNotifier(delay={'a': 0.2, 'b': 0.2, 'c': 0.2})
+        m = messenger(n, ['a', 'b', 'c'], mode='all')
+        start = time.monotonic()
+        self.assertTrue(m.notify('hello'))
+        self.assertLess(time.monotonic() - start, 0.4,
+                        'should send to instances concurrently')
+        self.assertCountEqual(n.sent, ['a', 'b', 'c'])
+
+    def test_no_fan_out_unless_thread_safe(self):
+        n = RecordingNotifier()
+        n.thread_safe = False
+        m = messenger(n, ['a', 'b'], mode='all')
+        _, results = m.send_all('svc', 'hello', ['a', 'b'])
+        self.assertEqual(results, [True, True],
+                         'should send in the calling thread')
+
+    def test_failed_all(self):
+        n = RecordingNotifier(fail={'a', 'c'})
+        m = messenger(n, ['a', 'b', 'c'], mode='all')
+        _, results = m.send_all('svc', 'hello', ['a', 'b', 'c'])
+        self.assertEqual(m.failed_all('svc', results), ['svc', 'svc'],
+                         'should name the service once per failure')
+        with self.assertRaises(NotifyException):
+            m.notify('hello')
+
+
+class TestHedgedSend(unittest.TestCase):
+    def test_target_in_time(self):
+        n = RecordingNotifier()
+        m = messenger(n, ['a', 'b'], hedge_delay=0.5)
+        self.assertTrue(m.hedged_send(n, 'a', 'b', 'hello'))
+        self.assertEqual(n.sent, ['a'], 'should not hedge a prompt send')
+
+    def test_slow_target(self):
+        n = RecordingNotifier(delay={'a': 1})
+        m = messenger(n, ['a', 'b'], hedge_delay=0.05)
+        start = time.monotonic()
+        self.assertTrue(m.hedged_send(n, 'a', 'b', 'hello'))
+        self.assertLess(time.monotonic() - start, 0.5,
+                        'should return the hedged result first')
+        self.assertEqual(n.sent, ['b'])
+
+    def test_failed_target(self):
+        n = RecordingNotifier(fail={'a'})
+        m = messenger(n, ['a', 'b'], hedge_delay=0.5)
+        self.assertTrue(m.hedged_send(n, 'a', 'b', 'hello'))
+        self.assertEqual(n.sent, ['a', 'b'], 'should fall back to alt')
+
+    def test_both_fail(self):
+        n = RecordingNotifier(fail={'a', 'b'}, delay={'a': 0.1})
+        m = messenger(n, ['a', 'b'], hedge_delay=0.05)
+        self.assertFalse(m.hedged_send(n, 'a', 'b', 'hello'))
+        self.assertCountEqual(n.sent, ['a', 'b'])
+
+
+class TestConcurrentNotify(unittest.TestCase):
+    def notify_both(self, m):
+        """Notifies 'good' and 'bad' at once. Returns whether each raised."""
+        raised = {}
+
+        def run(message):
+            try:
+                m.notify(message)
+                raised[message] = False
+            except NotifyException:
+                raised[message] = True
+
+        threads = [Thread(target=run, args=(message,))
+                   for message in ('good', 'bad')]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return raised
+
+    def test_sync(self):
+        # The good send outlasts the bad one.
+        n = RecordingNotifier(fail={'bad'}, delay={'good': 0.1})
+        m = messenger(n, ['a', 'b'])
+        for _ in range(5):
+            self.assertEqual(self.notify_both(m),
+                             {'good': False, 'bad': True},
+                             "should report only each call's own failures")
+
+    def test_async(self):
+        n = RecordingNotifier(fail={'bad'}, delay={'good': 0.1})
+        m = messenger(None, ['a'], factory=lambda proto: Async_Wrapper(n))
+        for _ in range(5):
+            self.assertEqual(self.notify_both(m),
+                             {'good': False, 'bad': True},
+                             "should report only each call's own failures")
+
+
+if __name__ == '__main__':
+    unittest.main()